@@ -1,10 +1,20 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import datetime
-import random
-import io
-from collections import Counter
+import hashlib
+import collections
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from rk_antrian import AntrianPekerjaan, AntrianPenuh
+from rk_gantungan import GudangGantungan
+from rk_pipeline import FORMAT_EKSPOR, FORMAT_MASUKAN, JENDELA_TANGGAL_HARI, KOLOM_PARTISI, KOLOM_TANGGAL, TAHAP_PIPELINE
+from rk_potongan import FORMAT_POTONGAN, UKURAN_POTONGAN_BACA
 
 # ---------------------------------------------------------------------
 # KONFIGURASI APLIKASI STREAMLIT
@@ -13,134 +23,169 @@ st.set_page_config(layout="wide", page_title="Pencocokan Hutang/Piutang CABANG -
 
 st.title("Pencocokan Hutang/Piutang Afiliasi CABANG - SBY")
 # Diubah: Menghapus referensi ke file gantungan
-st.markdown("Unggah 2 file CSV wajib (CABANG - SBY & SBY - CABANG) untuk memulai.")
+st.markdown("Unggah 2 file wajib (CABANG - SBY & SBY - CABANG) berformat CSV, XLSX atau ODS untuk memulai.")
 
 # ---------------------------------------------------------------------
-# FUNGSI-FUNGSI (DARI KODE ANDA - TIDAK DIUBAH)
+# CACHE HASIL
 # ---------------------------------------------------------------------
+# Hasil disimpan per isi file + parameter dan dibagi antar sesi, sehingga
+# unggahan yang sama (oleh siapa pun) tidak dihitung ulang. Pipeline sendiri
+# berjalan di antrian pekerjaan (di luar skrip), jadi hasilnya disimpan di
+# sini saat pekerjaan selesai, bukan lewat st.cache_data.
+CACHE_TTL_DETIK = 2 * 60 * 60   # hasil kedaluwarsa setelah 2 jam
+CACHE_MAKS_ENTRI = 16           # hasil terlama dibuang jika lebih dari ini
+
+
+def kunci_cache(*isi_file, **parameter):
+    """Hash SHA-256 dari isi file yang diunggah dan parameter proses."""
+    h = hashlib.sha256()
+    for isi in isi_file:
+        h.update(hashlib.sha256(isi).digest())
+    h.update(repr(sorted(parameter.items())).encode())
+    return h.hexdigest()
+
+
+class CacheHasil:
+    """Cache hasil per kunci: kedaluwarsa setelah `ttl` detik, entri terlama dibuang di atas `maks_entri`."""
+
+    def __init__(self, ttl, maks_entri):
+        self.ttl = ttl
+        self.maks_entri = maks_entri
+        self._isi = collections.OrderedDict()
+        self._kunci = threading.Lock()
+
+    def ambil(self, kunci):
+        with self._kunci:
+            batas = time.monotonic() - self.ttl
+            for k in [k for k, (waktu, _) in self._isi.items() if waktu < batas]:
+                del self._isi[k]
+            if kunci not in self._isi:
+                return None
+            self._isi.move_to_end(kunci)
+            return self._isi[kunci][1]
+
+    def simpan(self, kunci, hasil):
+        with self._kunci:
+            self._isi[kunci] = (time.monotonic(), hasil)
+            self._isi.move_to_end(kunci)
+            while len(self._isi) > self.maks_entri:
+                self._isi.popitem(last=False)
+
+
+@st.cache_resource
+def cache_hasil():
+    # Satu objek untuk seluruh sesi di proses server ini.
+    return CacheHasil(CACHE_TTL_DETIK, CACHE_MAKS_ENTRI)
+
+
+@st.cache_resource
+def gudang_gantungan(cabang):
+    # Simpanan baris GANTUNG antar periode (SQLite lokal), dibagi antar sesi; baris dipisah per cabang.
+    return GudangGantungan(cabang)
 
-# Fungsi reconcile_accounts_table (Persis seperti kode Anda)
-def reconcile_accounts_table(df):
-    """
-    Melakukan rekonsiliasi Debet dan Kredit, menghasilkan dua DataFrame:
-    1. offset_table -> baris-baris yang berhasil di-offset
-    2. gantung_table -> baris-baris yang belum ketemu pasangan
-    """
-
-    # --- Persiapan Data ---
-    debits_list = df['Debet'].fillna(0).loc[df['Debet'] > 0].to_list()
-    credits_list = df['Kredit'].fillna(0).loc[df['Kredit'] > 0].to_list()
-
-    # --- Langkah 1: Pasangan nilai persis ---
-    debit_counts = Counter(debits_list)
-    credit_counts = Counter(credits_list)
-    offset_persis = {}
-
-    common_values = set(debit_counts.keys()) & set(credit_counts.keys())
-    for value in common_values:
-        matched_count = min(debit_counts[value], credit_counts[value])
-        if matched_count > 0:
-            offset_persis[value] = matched_count
-            debit_counts[value] -= matched_count
-            credit_counts[value] -= matched_count
-
-    # --- Sisa nilai ---
-    sisa_debit = []
-    for val, count in debit_counts.items():
-        sisa_debit.extend([val] * count)
-
-    sisa_kredit = []
-    for val, count in credit_counts.items():
-        sisa_kredit.extend([val] * count)
-
-    sisa_debit.sort(reverse=True)
-    sisa_kredit.sort(reverse=True)
-
-    # --- Langkah 2: Greedy kombinasi ---
-    offset_penjumlahan = []
-    used_debit = [False] * len(sisa_debit)
-    used_credit = [False] * len(sisa_kredit)
-
-    # (a) 1 debit = banyak kredit
-    for i in range(len(sisa_debit)):
-        target_debit = sisa_debit[i]
-        current_sum = 0
-        matched_credits_indices = []
-        for j in range(len(sisa_kredit)):
-            if not used_credit[j] and current_sum + sisa_kredit[j] <= target_debit:
-                current_sum += sisa_kredit[j]
-                matched_credits_indices.append(j)
-        if abs(current_sum - target_debit) < 1e-6:
-            used_debit[i] = True
-            for k in matched_credits_indices:
-                used_credit[k] = True
-            offset_penjumlahan.append({
-                "debit": target_debit,
-                "kredit_group": [sisa_kredit[k] for k in matched_credits_indices]
-            })
-
-    # (b) 1 kredit = banyak debit
-    for i in range(len(sisa_kredit)):
-        if used_credit[i]:
-            continue
-        target_kredit = sisa_kredit[i]
-        current_sum = 0
-        matched_debits_indices = []
-        for j in range(len(sisa_debit)):
-            if not used_debit[j] and current_sum + sisa_debit[j] <= target_kredit:
-                current_sum += sisa_debit[j]
-                matched_debits_indices.append(j)
-        if abs(current_sum - target_kredit) < 1e-6:
-            used_credit[i] = True
-            for k in matched_debits_indices:
-                used_debit[k] = True
-            offset_penjumlahan.append({
-                "debit_group": [sisa_debit[k] for k in matched_debits_indices],
-                "kredit": target_kredit
-            })
-
-    # --- Buat tabel hasil ---
-    offset_values = set(offset_persis.keys())
-    for g in offset_penjumlahan:
-        if "debit" in g:
-            offset_values.add(g["debit"])
-            offset_values.update(g["kredit_group"])
-        else:
-            offset_values.add(g["kredit"])
-            offset_values.update(g["debit_group"])
-
-    df = df.copy()
-    df["Debet"] = df["Debet"].fillna(0)
-    df["Kredit"] = df["Kredit"].fillna(0)
-
-    df["Posisi"] = df.apply(
-        lambda x: "OFFSET" if (x["Debet"] in offset_values or x["Kredit"] in offset_values) else "GANTUNG",
-        axis=1
-    )
 
-    offset_table = df[df["Posisi"] == "OFFSET"].sort_values(by=["Debet", "Kredit"], ascending=False)
-    gantung_table = df[df["Posisi"] == "GANTUNG"].sort_values(by=["Debet", "Kredit"], ascending=False)
-
-    return offset_table, gantung_table
-
-# Fungsi combine_with_spacing (Persis seperti kode Anda)
-def combine_with_spacing(list_df, all_columns):
-    combined = []
-    for name in list_df:
-        if name in globals():
-            df = globals()[name]
-            df_copy = df.copy()
-            df_copy = df_copy.reindex(columns=all_columns)
-            combined.append(df_copy)
-            empty = pd.DataFrame([[""] * len(all_columns)] * 2, columns=all_columns)
-            combined.append(empty)
-        else:
-            st.warning(f"DataFrame {name} tidak ditemukan, dilewati.")
-    
-    if not combined:
-        return pd.DataFrame(columns=all_columns)
-        
-    return pd.concat(combined, ignore_index=True)
+# ---------------------------------------------------------------------
+# INSTRUMENTASI
+# ---------------------------------------------------------------------
+# Setiap tahap (durasi, baris masuk/keluar, puncak memori) ditambahkan ke
+# log JSON lines ini; profil cProfile (opsional) disimpan di FOLDER_PROFIL.
+BERKAS_LOG_TAHAP = "rk_tahap.jsonl"
+FOLDER_PROFIL = "profil"
+
+
+def tabel_tahap(catatan):
+    """DataFrame ringkas dari catatan PencatatTahap untuk panel instrumentasi."""
+    tabel = pd.DataFrame(catatan).reindex(columns=["tahap", "baris_masuk", "baris_keluar", "detik", "puncak_memori_mb"])
+    return tabel.dropna(axis=1, how="all")
+
+
+# ---------------------------------------------------------------------
+# ANTRIAN PEKERJAAN
+# ---------------------------------------------------------------------
+# Proses berjalan di pool proses bersama (lihat rk_antrian), sehingga sesi
+# tidak tertahan dan jumlah proses serentak dibatasi untuk semua pengguna.
+INTERVAL_PANTAU_DETIK = 1.0
+
+
+@st.cache_resource
+def antrian_pekerjaan():
+    return AntrianPekerjaan()
+
+
+# Unggahan dan hasil setiap pekerjaan disimpan di folder kerja; pekerja hanya
+# menerima path-nya. Folder yang tidak berubah selama CACHE_TTL_DETIK dihapus
+# (hasil di cache juga sudah kedaluwarsa saat itu).
+FOLDER_KERJA = os.path.join(tempfile.gettempdir(), "rk_kerja")
+
+
+def siapkan_folder_kerja(*unggahan):
+    """Tulis unggahan ke folder kerja baru; kembalikan (folder, [path unggahan])."""
+    os.makedirs(FOLDER_KERJA, exist_ok=True)
+    batas = time.time() - CACHE_TTL_DETIK
+    for nama in os.listdir(FOLDER_KERJA):
+        lama = os.path.join(FOLDER_KERJA, nama)
+        if os.path.getmtime(lama) < batas:
+            shutil.rmtree(lama, ignore_errors=True)
+    folder = tempfile.mkdtemp(dir=FOLDER_KERJA)
+    paths = []
+    for i, berkas in enumerate(unggahan):
+        paths.append(os.path.join(folder, f"masukan_{i}"))
+        with open(paths[-1], "wb") as tujuan:
+            tujuan.write(berkas.getbuffer())
+    return folder, paths
+
+
+def simpan_hasil_sesi(kunci, hasil, format_ekspor, id_proses, dari_cache=False, profil=None):
+    """Simpan hasil ke session_state agar tombol download tampil di rerun berikutnya."""
+    ekstensi = FORMAT_EKSPOR[format_ekspor]["ekstensi"]
+    st.session_state["hasil_rk"] = {
+        "kunci": kunci,
+        "hasil": hasil,
+        "format": format_ekspor,
+        "nama_file": f"hasil_RK_{datetime.datetime.now():%Y%m%d_%H%M}.{ekstensi}",
+        "id_proses": id_proses,
+        "dari_cache": dari_cache,
+        "profil": profil,
+    }
+
+
+@st.fragment(run_every=INTERVAL_PANTAU_DETIK)
+def pantau_pekerjaan():
+    """Tampilkan posisi antrian / kemajuan pekerjaan sesi ini; pindahkan hasilnya bila selesai."""
+    info = st.session_state["pekerjaan_rk"]
+    antrian = antrian_pekerjaan()
+    pekerjaan = antrian.ambil(info["id"])
+    if pekerjaan is None:
+        st.session_state["galat_rk"] = "Pekerjaan tidak ditemukan lagi (server mungkin dimulai ulang). Silakan proses ulang."
+    elif pekerjaan.status == "antri":
+        posisi, jumlah = antrian.posisi(pekerjaan.id)
+        berjalan, _ = antrian.beban()
+        st.info(
+            f"⏳ Menunggu giliran: posisi {posisi} dari {jumlah} dalam antrian "
+            f"({berjalan}/{antrian.maks_pekerja} proses sedang berjalan)."
+        )
+        if st.button("Batalkan"):
+            antrian.batalkan(pekerjaan.id)
+        return
+    elif pekerjaan.status == "jalan":
+        urutan = TAHAP_PIPELINE.index(pekerjaan.tahap) + 1 if pekerjaan.tahap else 0
+        st.progress(
+            pekerjaan.kemajuan,
+            text=f"Tahap {urutan}/{len(TAHAP_PIPELINE)}: {pekerjaan.tahap or 'memulai'}... "
+                 f"({time.time() - pekerjaan.waktu_mulai:.0f} detik)",
+        )
+        return
+    elif pekerjaan.status == "selesai":
+        simpan_hasil_sesi(info["kunci"], pekerjaan.hasil, info["format"], pekerjaan.id, profil=info["profil"])
+    elif pekerjaan.status == "gagal":
+        st.session_state["galat_rk"] = pekerjaan.galat
+        st.session_state["jejak_rk"] = pekerjaan.jejak
+    else:
+        st.session_state["galat_rk"] = "Pekerjaan dibatalkan."
+    # Pekerjaan tidak aktif lagi: hentikan pemantauan dan tampilkan hasil di seluruh halaman.
+    del st.session_state["pekerjaan_rk"]
+    st.rerun()
+
 
 # ---------------------------------------------------------------------
 # TATA LETAK INPUT (UI) - DISEDERHANAKAN
@@ -149,321 +194,195 @@ def combine_with_spacing(list_df, all_columns):
 # --- Bagian CABANG - SBY ---
 st.header("Bagian CABANG - SBY")
 # Diubah: Menghapus st.columns dan file gantungan
-cabang_sby_file = st.file_uploader("Input File CABANG - SBY (Wajib)", type="csv")
+cabang_sby_file = st.file_uploader("Input File CABANG - SBY (Wajib)", type=list(FORMAT_MASUKAN))
 
 # --- Bagian SBY - CABANG ---
 st.header("Bagian SBY - CABANG")
 # Diubah: Menghapus st.columns dan file gantungan
-sby_cabang_file = st.file_uploader("Input file SBY - CABANG (Wajib)", type="csv")
+sby_cabang_file = st.file_uploader("Input file SBY - CABANG (Wajib)", type=list(FORMAT_MASUKAN))
 
 # --- Input Selisih ---
 st.header("Input Selisih")
 selisih_input = st.number_input("Input selisih periode sebelumnya", value=0, step=1, help="Masukkan nilai selisih dari periode sebelumnya.")
 
+# --- Gantungan Periode Sebelumnya ---
+st.header("Gantungan Periode Sebelumnya")
+pakai_gantungan = st.checkbox(
+    "Cocokkan dengan gantungan tersimpan & simpan gantungan periode ini",
+    help="Baris GANTUNG periode sebelumnya yang nominalnya menutup sisa periode ini ikut di-offset (Sumber = gantungan).",
+)
+kode_cabang_input = st.text_input(
+    "Kode cabang", disabled=not pakai_gantungan,
+    help="Gantungan hanya dicocokkan dengan gantungan tersimpan dari cabang yang sama, mis. BPN.",
+).strip().upper()
+periode_input = st.text_input("Periode (YYYY-MM)", value=f"{datetime.date.today():%Y-%m}", disabled=not pakai_gantungan)
+if pakai_gantungan and kode_cabang_input:
+    ringkasan_gantungan = gudang_gantungan(kode_cabang_input).ringkasan()
+    if len(ringkasan_gantungan):
+        st.dataframe(ringkasan_gantungan, hide_index=True)
+    else:
+        st.caption("Belum ada gantungan tersimpan.")
+
+# --- Partisi Offset ---
+partisi_input = st.multiselect(
+    "Partisi pencarian offset (opsional)",
+    options=KOLOM_PARTISI,
+    help="Offset dicari dulu di antara baris dengan nilai kolom yang sama, lalu sisanya dicocokkan secara global. "
+         "Lebih cepat untuk file besar dan mengurangi pasangan antar mitra/voyage yang tidak berhubungan.",
+)
+jendela_input = JENDELA_TANGGAL_HARI
+if any(col in KOLOM_TANGGAL for col in partisi_input):
+    jendela_input = st.number_input("Jendela tanggal (hari)", min_value=1, value=JENDELA_TANGGAL_HARI, step=1)
+
+# --- Format Hasil ---
+format_ekspor = st.selectbox(
+    "Format hasil",
+    options=list(FORMAT_EKSPOR),
+    format_func=lambda kode: FORMAT_EKSPOR[kode]["label"],
+    help="CSV/Parquet (.zip) berisi satu berkas per lembar, untuk diolah aplikasi lain.",
+)
+
+# --- File Sangat Besar ---
+hemat_memori = st.checkbox(
+    "Mode hemat memori (file sangat besar)",
+    help="File dibaca per potongan dan baris kerja ditampung di disk, jadi memori tetap kecil; hasilnya sama "
+         "tetapi proses lebih lambat. Tidak bisa digabung dengan gantungan, partisi offset atau format Parquet.",
+)
+
+# --- Diagnostik ---
+with st.expander("Diagnostik (opsional)"):
+    ukur_memori = st.checkbox("Ukur puncak memori per tahap", help="Memakai tracemalloc; proses menjadi lebih lambat.")
+    profil_aktif = st.checkbox(
+        "Simpan profil cProfile untuk proses ini",
+        help="Proses dijalankan ulang tanpa cache dan hasil profil (.prof) bisa diunduh untuk dikirim ke pengelola.",
+    )
+
 st.divider()
 
-# Tombol untuk memulai proses
-process_button = st.button("Mulai Proses Pencocokan", type="primary", use_container_width=True)
+# Tombol untuk memulai proses (nonaktif selama pekerjaan sesi ini masih berjalan/antri)
+process_button = st.button(
+    "Mulai Proses Pencocokan", type="primary", use_container_width=True,
+    disabled="pekerjaan_rk" in st.session_state,
+)
 
 # ---------------------------------------------------------------------
 # LOGIKA UTAMA (SAAT TOMBOL DITEKAN)
 # ---------------------------------------------------------------------
+kunci_input = None
+if cabang_sby_file and sby_cabang_file:
+    kunci_input = kunci_cache(
+        cabang_sby_file.getvalue(), sby_cabang_file.getvalue(), selisih=selisih_input, format_ekspor=format_ekspor,
+        periode=periode_input if pakai_gantungan else None, partisi=partisi_input, jendela_hari=jendela_input,
+    )
+
 if process_button:
     # Validasi input (Logika ini sudah benar, tidak perlu diubah)
     if not all([cabang_sby_file, sby_cabang_file]):
         st.error("Harap unggah file WAJIB (CABANG SBY & SBY CABANG) untuk melanjutkan.")
+    elif pakai_gantungan and not kode_cabang_input:
+        st.error("Isi kode cabang agar gantungan tidak tercampur dengan cabang lain.")
+    elif pakai_gantungan and not re.fullmatch(r"\d{4}-\d{2}", periode_input):
+        st.error("Periode harus berformat YYYY-MM, misalnya 2024-01.")
+    elif hemat_memori and (pakai_gantungan or partisi_input or format_ekspor not in FORMAT_POTONGAN):
+        st.error("Mode hemat memori tidak bisa digabung dengan gantungan, partisi offset atau format Parquet.")
     else:
+        st.session_state.pop("galat_rk", None)
+        st.session_state.pop("jejak_rk", None)
         try:
-            with st.spinner("Sedang memproses... Harap tunggu..."):
-                
-                # == MULAI KODE ASLI ANDA ==
-                
-                selisih_sebelumnya = selisih_input
-
-                columns = [
-                'Tanggal Kasir', 'ID Dokumen', 'Nomor Dokumen', 'Dibayarkan (ke/dari)', 'Keperluan', 'Vessel Voyage',
-                'Debet', 'Kredit', 'Tempat Pembayaran', 'Pembuat', 'Sumber Dokumen', 'Jenis Dokumen',
-                'Tanggal Delivery', 'Nama Kode', 'Kode Accounting', 'User Pengakuan', 'Unit', 'Divisi',
-                'Flag KBM/KDRT', 'Target_First', 'Target_Jenis', 'Target_Second'
-                ]
-
-                # --- PROSES CABANG SBY ---
-                # Logika pemisah fleksibel Anda tetap dipertahankan
-                cabang_sby = pd.read_csv(cabang_sby_file, sep=None, engine='python', encoding='utf-8-sig')
-                available_cols_cabang_sby = [col for col in columns if col in cabang_sby.columns]
-                cabang_sby = cabang_sby[available_cols_cabang_sby].copy()
-                
-                # (DIHAPUS) Blok 'if gantungan_cabang_sby_file is not None' dihapus
-
-                # (Logika asli Anda berlanjut)
-                cabang_sby["ID_1"] = np.nan
-                cabang_sby = cabang_sby.reset_index()
-
-                cabang_sby["Debet"] = cabang_sby["Debet"].replace("-", 0)
-                cabang_sby["Kredit"] = cabang_sby["Kredit"].replace("-", 0)
-                cabang_sby["Debet"] = cabang_sby["Debet"].astype(str).str.replace(",", "", regex=False)
-                cabang_sby["Kredit"] = cabang_sby["Kredit"].astype(str).str.replace(",", "", regex=False)
-                cabang_sby["Debet"] = pd.to_numeric(cabang_sby["Debet"]).fillna(0)
-                cabang_sby["Kredit"] = pd.to_numeric(cabang_sby["Kredit"]).fillna(0)
-
-                cabang_sby_PN = cabang_sby[cabang_sby['Keperluan'].str.contains("PEMBAYARAN ATAS NOTA", case=False, na=False)].copy()
-                cabang_sby = cabang_sby[~cabang_sby['Keperluan'].str.contains("PEMBAYARAN ATAS NOTA", case=False, na=False)].copy()
-
-                cabang_sby["ID_1"] = cabang_sby["Keperluan"].str.extract(r'(?:ID)?BKK\s*[:\-]?\s*(\d+/\d{4})', expand=False)
-                cabang_sby_bkk = cabang_sby[cabang_sby["ID_1"].notna()].copy()
-                cabang_sby = cabang_sby[cabang_sby["ID_1"].isna()].copy()
-
-                cabang_sby["ID_1"] = cabang_sby["Keperluan"].str.extract(r'(?:ID)?BKM\s*[:\-]?\s*(\d+/\d{4})', expand=False)
-                cabang_sby_bkm = cabang_sby[cabang_sby["ID_1"].notna()].copy()
-                cabang_sby = cabang_sby[cabang_sby["ID_1"].isna()].copy()
-
-                cabang_sby_va_ri = cabang_sby[
-                    cabang_sby["Keperluan"].str.contains("PENERIMAAN GIRO DENGAN VA|KODE LAWAN RI", case=False, na=False)
-                ].copy()
-                cabang_sby = cabang_sby[
-                    ~cabang_sby["Keperluan"].str.contains("PENERIMAAN GIRO DENGAN VA|KODE LAWAN RI", case=False, na=False)
-                ].copy()
-                
-                # --- PROSES SBY CABANG ---
-                # Logika pemisah fleksibel Anda tetap dipertahankan
-                sby_cabang = pd.read_csv(sby_cabang_file, sep=None, engine='python', encoding='utf-8-sig')
-                available_cols_sby_cabang = [col for col in columns if col in sby_cabang.columns]
-                sby_cabang = sby_cabang[available_cols_sby_cabang].copy()
-
-                # (DIHAPUS) Blok 'if gantungan_sby_cabang_file is not None' dihapus
-                
-                # (Logika asli Anda berlanjut)
-                sby_cabang["ID_1"] = np.nan
-                sby_cabang = sby_cabang.reset_index()
-
-                sby_cabang["Debet"] = sby_cabang["Debet"].replace("-", 0)
-                sby_cabang["Kredit"] = sby_cabang["Kredit"].replace("-", 0)
-                sby_cabang["Debet"] = sby_cabang["Debet"].astype(str).str.replace(",", "", regex=False)
-                sby_cabang["Kredit"] = sby_cabang["Kredit"].astype(str).str.replace(",", "", regex=False)
-                sby_cabang["Debet"] = pd.to_numeric(sby_cabang["Debet"]).fillna(0)
-                sby_cabang["Kredit"] = pd.to_numeric(sby_cabang["Kredit"]).fillna(0)
-
-                sby_cabang_PN = sby_cabang[sby_cabang['Keperluan'].str.contains("PEMBAYARAN ATAS NOTA", case=False, na=False)].copy()
-                sby_cabang = sby_cabang[~sby_cabang['Keperluan'].str.contains("PEMBAYARAN ATAS NOTA", case=False, na=False)].copy()
-
-                sby_cabang_jmu = sby_cabang[
-                    sby_cabang["Keperluan"].str.contains("JMU ASD|JMU ASK", case=False, na=False)
-                ].copy()
-                sby_cabang = sby_cabang[~sby_cabang["Keperluan"].str.contains("JMU ASD|JMU ASK", case=False, na=False)].copy()
-
-                sby_cabang["ID_1"] = sby_cabang["Keperluan"].str.extract(r'(?:ID)?BKK\s*[:\-]?\s*(\d+/\d{4})', expand=False)
-                sby_cabang_bkk = sby_cabang[sby_cabang["ID_1"].notna()].copy()
-                sby_cabang = sby_cabang[sby_cabang["ID_1"].isna()].copy()
-
-                sby_cabang["ID_1"] = sby_cabang["Keperluan"].str.extract(r'(?:ID)?BKM\s*[:\-]?\s*(\d+/\d{4})', expand=False)
-                sby_cabang_bkm = sby_cabang[sby_cabang["ID_1"].notna()].copy()
-                sby_cabang = sby_cabang[sby_cabang["ID_1"].isna()].copy()
-
-                sby_cabang_va_ri = sby_cabang[
-                    sby_cabang["Keperluan"].str.contains("PEMBAYARAN DPP GIRO|KODE LAWAN RO|PEMBAYARAN DPP TUNAI", case=False, na=False)
-                ].copy()
-                sby_cabang = sby_cabang[
-                    ~sby_cabang["Keperluan"].str.contains("PEMBAYARAN DPP GIRO|KODE LAWAN RO|PEMBAYARAN DPP TUNAI", case=False, na=False)
-                ].copy()
-
-                # --- PROSES TOTAL (VA/RI) --- (TIDAK DIUBAH)
-                df_sebelumnya = pd.DataFrame({"Debet": [selisih_sebelumnya]})
-                cabang_sby_va_ri = pd.concat([df_sebelumnya, cabang_sby_va_ri], ignore_index=True)
-
-                total_va_ri = pd.DataFrame({
-                    "Debet": [cabang_sby_va_ri["Debet"].sum() + sby_cabang_va_ri["Debet"].sum()],
-                    "Kredit": [cabang_sby_va_ri["Kredit"].sum() + sby_cabang_va_ri["Kredit"].sum()],
-                    "Tempat Pembayaran": [(cabang_sby_va_ri["Debet"].sum() + sby_cabang_va_ri["Debet"].sum()) - (cabang_sby_va_ri["Kredit"].sum() + sby_cabang_va_ri["Kredit"].sum())]
-                })
-
-                sby_cabang_va_ri_total = pd.concat([sby_cabang_va_ri, total_va_ri], ignore_index=True)
-                cabang_sby_va_ri_total = pd.concat([cabang_sby_va_ri, total_va_ri], ignore_index=True)
-                sby_cabang_va_ri_total["Grup"] = "A1"
-                cabang_sby_va_ri_total["Grup"] = "A1"
-
-
-                # --- PROSES TOTAL (PN) --- (TIDAK DIUBAH)
-                total_row_PN = pd.DataFrame({
-                    "Debet": [cabang_sby_PN["Debet"].sum() + sby_cabang_PN["Debet"].sum()],
-                    "Kredit": [cabang_sby_PN["Kredit"].sum() + sby_cabang_PN["Kredit"].sum()],
-                    "Tempat Pembayaran": [(cabang_sby_PN["Debet"].sum() + sby_cabang_PN["Debet"].sum()) - (cabang_sby_PN["Kredit"].sum() + sby_cabang_PN["Kredit"].sum())]
-                })
-                cabang_sby_PN_total = pd.concat([cabang_sby_PN, total_row_PN], ignore_index=True)
-                sby_cabang_PN_total = pd.concat([sby_cabang_PN, total_row_PN], ignore_index=True)
-                cabang_sby_PN_total["Grup"] = "A2"
-                sby_cabang_PN_total["Grup"] = "A2"
-
-                # --- PROSES MATCHING (BKK/BKM) --- (TIDAK DIUBAH)
-                list_bkk_cabang_sby = cabang_sby_bkk["ID_1"].unique().tolist()
-                sby_cabang_bkk_matched = sby_cabang[sby_cabang["ID Dokumen"].isin(list_bkk_cabang_sby)].copy()
-                sby_cabang = sby_cabang[~sby_cabang["ID Dokumen"].isin(list_bkk_cabang_sby)].copy()
-
-                total_row_bkk = pd.DataFrame({
-                    "Debet": [cabang_sby_bkk["Debet"].sum() + sby_cabang_bkk_matched["Debet"].sum()],
-                    "Kredit": [cabang_sby_bkk["Kredit"].sum() + sby_cabang_bkk_matched["Kredit"].sum()],
-                    "Tempat Pembayaran": [(cabang_sby_bkk["Debet"].sum() + sby_cabang_bkk_matched["Debet"].sum()) - (cabang_sby_bkk["Kredit"].sum() + sby_cabang_bkk_matched["Kredit"].sum())]
-                })
-                cabang_sby_bkk_total = pd.concat([cabang_sby_bkk, total_row_bkk], ignore_index=True)
-                sby_cabang_bkk_matched_total = pd.concat([sby_cabang_bkk_matched, total_row_bkk], ignore_index=True)
-                cabang_sby_bkk_total["Grup"] = "A3"
-                sby_cabang_bkk_matched_total["Grup"] = "A3"
-
-
-                list_bkm_cabang_sby = cabang_sby_bkm["ID_1"].unique().tolist()
-                sby_cabang_bkm_matched = sby_cabang[sby_cabang["ID Dokumen"].isin(list_bkm_cabang_sby)].copy()
-                sby_cabang = sby_cabang[~sby_cabang["ID Dokumen"].isin(list_bkm_cabang_sby)].copy()
-
-                total_row_bkm = pd.DataFrame({
-                    "Debet": [cabang_sby_bkm["Debet"].sum() + sby_cabang_bkm_matched["Debet"].sum()],
-                    "Kredit": [cabang_sby_bkm["Kredit"].sum() + sby_cabang_bkm_matched["Kredit"].sum()],
-                    "Tempat Pembayaran": [(cabang_sby_bkm["Debet"].sum() + sby_cabang_bkm_matched["Debet"].sum()) - (cabang_sby_bkm["Kredit"].sum() + sby_cabang_bkm_matched["Kredit"].sum())]
-                })
-                cabang_sby_bkm_total = pd.concat([cabang_sby_bkm, total_row_bkm], ignore_index=True)
-                sby_cabang_bkm_matched_total = pd.concat([sby_cabang_bkm_matched, total_row_bkm], ignore_index=True)
-                cabang_sby_bkm_total["Grup"] = "A4"
-                sby_cabang_bkm_matched_total["Grup"] = "A4"
-
-                list_bkk_sby_cabang = sby_cabang_bkk["ID_1"].unique().tolist()
-                cabang_sby_bkk_matched = cabang_sby[cabang_sby["ID Dokumen"].isin(list_bkk_sby_cabang)].copy()
-                cabang_sby = cabang_sby[~cabang_sby["ID Dokumen"].isin(list_bkk_sby_cabang)].copy()
-
-                total_row_bkk_2 = pd.DataFrame({
-                    "Debet": [sby_cabang_bkk["Debet"].sum() + cabang_sby_bkk_matched["Debet"].sum()],
-                    "Kredit": [sby_cabang_bkk["Kredit"].sum() + cabang_sby_bkk_matched["Kredit"].sum()],
-                    "Tempat Pembayaran": [(sby_cabang_bkk["Debet"].sum() + cabang_sby_bkk_matched["Debet"].sum()) - (sby_cabang_bkk["Kredit"].sum() + cabang_sby_bkk_matched["Kredit"].sum())]
-                })
-                sby_cabang_bkk_total = pd.concat([sby_cabang_bkk, total_row_bkk_2], ignore_index=True)
-                cabang_sby_bkk_matched_total = pd.concat([cabang_sby_bkk_matched, total_row_bkk_2], ignore_index=True)
-                sby_cabang_bkk_total["Grup"] = "A5"
-                cabang_sby_bkk_matched_total["Grup"] = "A5"
-
-                list_bkm_sby_cabang = sby_cabang_bkm["ID_1"].unique().tolist()
-                cabang_sby_bkm_matched = cabang_sby[cabang_sby["ID Dokumen"].isin(list_bkm_sby_cabang)].copy()
-                cabang_sby = cabang_sby[~cabang_sby["ID Dokumen"].isin(list_bkm_sby_cabang)].copy()
-
-                total_row_bkm_2 = pd.DataFrame({
-                    "Debet": [sby_cabang_bkm["Debet"].sum() + cabang_sby_bkm_matched["Debet"].sum()],
-                    "Kredit": [sby_cabang_bkm["Kredit"].sum() + cabang_sby_bkm_matched["Kredit"].sum()],
-                    "Tempat Pembayaran": [(sby_cabang_bkm["Debet"].sum() + cabang_sby_bkm_matched["Debet"].sum()) - (sby_cabang_bkm["Kredit"].sum() + cabang_sby_bkm_matched["Kredit"].sum())]
-                })
-                sby_cabang_bkm_total = pd.concat([sby_cabang_bkm, total_row_bkm_2], ignore_index=True)
-                cabang_sby_bkm_matched_total = pd.concat([cabang_sby_bkm_matched, total_row_bkm_2], ignore_index=True)
-                sby_cabang_bkm_total["Grup"] = "A6"
-                cabang_sby_bkm_matched_total["Grup"] = "A6"
-
-                # --- PROSES TOTAL (JMU) --- (TIDAK DIUBAH)
-                total_jmu = pd.DataFrame({
-                    "Debet": [sby_cabang_jmu["Debet"].sum()],
-                    "Kredit": [sby_cabang_jmu["Kredit"].sum()],
-                    "Tempat Pembayaran": [sby_cabang_jmu["Debet"].sum() - sby_cabang_jmu["Kredit"].sum()]
-                })
-                sby_cabang_jmu_total = pd.concat([sby_cabang_jmu, total_jmu], ignore_index=True)
-                sby_cabang_jmu_total["Grup"] = "B1"
-
-                # --- PROSES REKONSILIASI GANTUNGAN (OFFSET) --- (TIDAK DIUBAH)
-                cabang_sby["Sumber"] = "cabang_sby"
-                sby_cabang["Sumber"] = "sby_cabang"
-                gabungan = pd.concat([cabang_sby, sby_cabang], ignore_index=True)
-
-                offset_df, gantung_df = reconcile_accounts_table(gabungan)
-
-                offset_df_cabang_sby = offset_df[offset_df["Sumber"] == "cabang_sby"].copy()
-                offset_df_sby_cabang = offset_df[offset_df["Sumber"] == "sby_cabang"].copy()
-
-                total_offset = pd.DataFrame({
-                    "Debet": [offset_df_sby_cabang["Debet"].sum() + offset_df_cabang_sby["Debet"].sum()],
-                    "Kredit": [offset_df_sby_cabang["Kredit"].sum() + offset_df_cabang_sby["Kredit"].sum()],
-                    "Tempat Pembayaran": [(offset_df_sby_cabang["Debet"].sum() + offset_df_cabang_sby["Debet"].sum()) - (offset_df_sby_cabang["Kredit"].sum() + offset_df_cabang_sby["Kredit"].sum())]
-                })
-                offset_df_cabang_sby_total = pd.concat([offset_df_cabang_sby, total_offset], ignore_index=True)
-                offset_df_sby_cabang_total = pd.concat([offset_df_sby_cabang, total_offset], ignore_index=True)
-                offset_df_cabang_sby_total["Grup"] = "C1"
-                offset_df_sby_cabang_total["Grup"] = "C1"
-
-                gantung_df_cabang_sby = gantung_df[gantung_df["Sumber"] == "cabang_sby"].copy()
-                total_gantung_cabang_sby = pd.DataFrame({
-                    "Debet": [gantung_df_cabang_sby["Debet"].sum()],
-                    "Kredit": [gantung_df_cabang_sby["Kredit"].sum()]
-                })
-                gantung_df_cabang_sby_total = pd.concat([gantung_df_cabang_sby, total_gantung_cabang_sby], ignore_index=True)
-                gantung_df_cabang_sby_total["Grup"] = "D1"
-
-                gantung_sby_cabang = gantung_df[gantung_df["Sumber"] == "sby_cabang"].copy()
-                total_gantung_sby_cabang = pd.DataFrame({
-                    "Debet": [gantung_sby_cabang["Debet"].sum()],
-                    "Kredit": [gantung_sby_cabang["Kredit"].sum()]
-                })
-                gantung_df_sby_cabang_total = pd.concat([gantung_sby_cabang, total_gantung_sby_cabang], ignore_index=True)
-                gantung_df_sby_cabang_total["Grup"] = "D2"
-
-                # --- PROSES FINALISASI & EXPORT --- (TIDAK DIUBAH)
-                columns_final = [
-                    'Grup',
-                    'index', 'Tanggal Kasir', 'ID Dokumen', 'Nomor Dokumen', 'Dibayarkan (ke/dari)', 'Keperluan',
-                    'Vessel Voyage', 'Debet', 'Kredit', 'Tempat Pembayaran', 'Pembuat', 'Sumber Dokumen',
-                    'Jenis Dokumen', 'Tanggal Delivery', 'Nama Kode', 'Kode Accounting', 'User Pengakuan',
-                    'Unit', 'Divisi', 'Flag KBM/KDRT', 'Target_First', 'Target_Jenis', 'Target_Second'
-                ]
-                
-                if 'Sumber' not in columns_final:
-                    columns_final.append('Sumber')
-                if 'Posisi' not in columns_final:
-                    columns_final.append('Posisi')
-
-
-                list_df_names = [
-                    "cabang_sby_va_ri_total", "cabang_sby_PN_total", "cabang_sby_bkk_total", "cabang_sby_bkm_total",
-                    "cabang_sby_bkk_matched_total", "cabang_sby_bkm_matched_total", "offset_df_cabang_sby_total",
-                    "gantung_df_cabang_sby_total", "sby_cabang_va_ri_total", "sby_cabang_PN_total",
-                    "sby_cabang_jmu_total", "sby_cabang_bkk_matched_total", "sby_cabang_bkm_matched_total",
-                    "sby_cabang_bkk_total", "sby_cabang_bkm_total", "offset_df_sby_cabang_total",
-                    "gantung_df_sby_cabang_total"
-                ]
-                
-                for name in list_df_names:
-                    if name in globals():
-                        df = globals()[name]
-                        available_cols = [col for col in columns_final if col in df.columns]
-                        globals()[name] = df[available_cols]
-
-                list_df_cabang_sby = [
-                    "gantung_df_cabang_sby_total", "cabang_sby_va_ri_total", "cabang_sby_PN_total",
-                    "cabang_sby_bkk_total", "cabang_sby_bkm_total", "cabang_sby_bkk_matched_total",
-                    "cabang_sby_bkm_matched_total", "offset_df_cabang_sby_total"
-                ]
-
-                list_df_sby_cabang = [
-                    "gantung_df_sby_cabang_total", "sby_cabang_va_ri_total", "sby_cabang_PN_total",
-                    "sby_cabang_jmu_total", "sby_cabang_bkk_matched_total", "sby_cabang_bkm_matched_total",
-                    "sby_cabang_bkk_total", "sby_cabang_bkm_total", "offset_df_sby_cabang_total"
-                ]
-
-                cabang_sby_all_combined = combine_with_spacing(list_df_cabang_sby, columns_final)
-                sby_cabang_all_combined = combine_with_spacing(list_df_sby_cabang, columns_final)
-
-                # == AKHIR KODE ASLI ANDA ==
-
-                # --- BUAT FILE EXCEL DI MEMORY ---
-                output_buffer = io.BytesIO()
-                with pd.ExcelWriter(output_buffer, engine="xlsxwriter") as writer:
-                    cabang_sby_all_combined.to_excel(writer, sheet_name="cabang_sby", index=False)
-                    sby_cabang_all_combined.to_excel(writer, sheet_name="sby_cabang", index=False)
-                
-                output_buffer.seek(0) 
-
-                st.success("✅ Proses Selesai! File Excel siap diunduh.")
-                
-                output_file_name = f"hasil_RK_{datetime.datetime.now():%Y%m%d_%H%M}.xlsx"
-
-                # Tampilkan tombol download
-                st.download_button(
-                    label="📥 Download Hasil Excel",
-                    data=output_buffer,
-                    file_name=output_file_name,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
+            # Profil hanya bermakna untuk proses yang benar-benar berjalan, dan hasil dengan
+            # gantungan bergantung pada isi simpanan saat itu, jadi keduanya melewati cache.
+            pakai_cache = not (profil_aktif or pakai_gantungan)
+            hasil = cache_hasil().ambil(kunci_input) if pakai_cache else None
+            if hasil is not None and os.path.exists(hasil["berkas"]):
+                simpan_hasil_sesi(kunci_input, hasil, format_ekspor, id_proses=None, dari_cache=True)
+            else:
+                folder, (cabang_sby_path, sby_cabang_path) = siapkan_folder_kerja(cabang_sby_file, sby_cabang_file)
+                opsi = {
+                    "format_ekspor": format_ekspor,
+                    "tujuan": os.path.join(folder, f"hasil.{FORMAT_EKSPOR[format_ekspor]['ekstensi']}"),
+                }
+                if hemat_memori:
+                    opsi.update(ukuran_potongan=UKURAN_POTONGAN_BACA, folder=folder)
+                else:
+                    # Pekerjaan sudah berjalan di pool antrian: pencarian per partisi hanya memakai
+                    # bagian CPU-nya agar total proses tetap sekitar os.cpu_count().
+                    proses = max(1, (os.cpu_count() or 1) // antrian_pekerjaan().maks_pekerja)
+                    opsi.update(partisi=partisi_input, jendela_hari=jendela_input, proses=proses)
+                if pakai_gantungan:
+                    opsi.update(gantungan=gudang_gantungan(kode_cabang_input), periode=periode_input)
+                profil = None
+                if profil_aktif:
+                    os.makedirs(FOLDER_PROFIL, exist_ok=True)
+                    profil = os.path.join(FOLDER_PROFIL, f"rk_{datetime.datetime.now():%Y%m%d_%H%M%S}.prof")
+                cache = cache_hasil()
+                id_pekerjaan = antrian_pekerjaan().kirim(
+                    cabang_sby_path, sby_cabang_path, selisih_input, opsi,
+                    ukur_memori=ukur_memori, log_jsonl=BERKAS_LOG_TAHAP, berkas_profil=profil,
+                    saat_selesai=(lambda p, kunci=kunci_input: cache.simpan(kunci, p.hasil)) if pakai_cache else None,
                 )
+                st.session_state["pekerjaan_rk"] = {
+                    "id": id_pekerjaan, "kunci": kunci_input, "format": format_ekspor, "profil": profil,
+                }
+                st.rerun()
 
+        except AntrianPenuh as e:
+            st.warning(str(e))
         except Exception as e:
             st.error(f"Terjadi error saat pemrosesan: {e}")
             st.exception(e)
+
+if "pekerjaan_rk" in st.session_state:
+    pantau_pekerjaan()
+
+if "galat_rk" in st.session_state:
+    st.error(f"Terjadi error saat pemrosesan: {st.session_state['galat_rk']}")
+    if st.session_state.get("jejak_rk"):
+        with st.expander("Detail error"):
+            st.code(st.session_state["jejak_rk"])
+
+# Hasil terakhir tetap tersedia di rerun berikutnya selama input tidak berubah.
+hasil_rk = st.session_state.get("hasil_rk")
+if hasil_rk and hasil_rk["kunci"] == kunci_input:
+    st.success(f"✅ Proses Selesai! File {FORMAT_EKSPOR[hasil_rk['format']]['label']} siap diunduh.")
+    if hasil_rk["hasil"]["waktu_habis"]:
+        st.warning("Batas waktu pencarian kombinasi offset tercapai; sebagian baris mungkin tetap GANTUNG.")
+    if hasil_rk["hasil"].get("ambigu"):
+        st.warning(
+            f"{hasil_rk['hasil']['ambigu']} baris tetap GANTUNG karena kombinasi N:1-nya tidak tunggal atau "
+            "kandidatnya terlalu banyak; coba partisi offset (mis. per Dibayarkan (ke/dari)) agar kandidat lebih sedikit."
+        )
+    if "gantungan" in hasil_rk["hasil"]:
+        gantungan = hasil_rk["hasil"]["gantungan"]
+        st.info(
+            f"Gantungan: {gantungan['terpakai']} baris tersimpan ter-offset, "
+            f"{gantungan['baru']} baris GANTUNG baru disimpan."
+        )
+
+    # Tampilkan tombol download
+    if os.path.exists(hasil_rk["hasil"]["berkas"]):
+        with open(hasil_rk["hasil"]["berkas"], "rb") as berkas_hasil:
+            st.download_button(
+                label="📥 Download Hasil",
+                data=berkas_hasil,
+                file_name=hasil_rk["nama_file"],
+                mime=FORMAT_EKSPOR[hasil_rk["format"]]["mime"],
+                use_container_width=True
+            )
+    else:
+        st.warning("Berkas hasil sudah kedaluwarsa dan dihapus; silakan proses ulang.")
+
+    # --- Panel instrumentasi ---
+    with st.expander("Rincian tahap proses"):
+        if hasil_rk["dari_cache"]:
+            st.caption("Hasil diambil dari cache; angka di bawah berasal dari proses aslinya.")
+        st.dataframe(tabel_tahap(hasil_rk["hasil"].get("tahap", [])), hide_index=True, use_container_width=True)
+        if hasil_rk["id_proses"]:
+            st.caption(f"ID proses {hasil_rk['id_proses']} - log per tahap: {BERKAS_LOG_TAHAP}")
+        if hasil_rk["profil"]:
+            with open(hasil_rk["profil"], "rb") as berkas_profil:
+                st.download_button(
+                    label="Download profil cProfile (.prof)",
+                    data=berkas_profil.read(),
+                    file_name=os.path.basename(hasil_rk["profil"]),
+                    mime="application/octet-stream",
+                )
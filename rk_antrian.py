@@ -0,0 +1,229 @@
+"""
+Antrian pekerjaan rekonsiliasi di latar belakang.
+
+Setiap proses dikirim sebagai pekerjaan ke pool proses berukuran tetap
+(`maks_pekerja`), sehingga skrip Streamlit tidak tertahan selama pipeline
+berjalan dan beban CPU tetap terbatas walau banyak pengguna memproses
+bersamaan. Pekerjaan di luar kapasitas menunggu (FIFO) sampai `maks_antrian`;
+di atas itu pengiriman ditolak. Kemajuan per tahap dikirim pekerja lewat
+multiprocessing.Queue dan dicatat di objek Pekerjaan.
+"""
+import concurrent.futures
+import cProfile
+import dataclasses
+import functools
+import itertools
+import multiprocessing
+import threading
+import time
+import traceback
+import uuid
+
+from rk_pipeline import TAHAP_PIPELINE, PencatatTahap, proses_rekonsiliasi
+from rk_potongan import proses_rekonsiliasi_potongan
+
+MAKS_PEKERJA = 2            # proses rekonsiliasi yang berjalan bersamaan
+MAKS_ANTRIAN = 8            # pekerjaan menunggu + berjalan; lebih dari ini ditolak
+SIMPAN_HASIL_DETIK = 2 * 60 * 60   # pekerjaan selesai dibuang setelah ini
+
+_kabar = None   # multiprocessing.Queue di proses pekerja, diisi _siapkan_pekerja
+
+
+class AntrianPenuh(Exception):
+    """Pekerjaan ditolak karena antrian sudah mencapai MAKS_ANTRIAN."""
+
+
+@dataclasses.dataclass
+class Pekerjaan:
+    id: str
+    urutan: int
+    status: str = "antri"           # antri / jalan / selesai / gagal / batal
+    tahap: str = None
+    kemajuan: float = 0.0
+    catatan: list = dataclasses.field(default_factory=list)
+    hasil: dict = None
+    galat: str = None
+    jejak: str = None
+    waktu_kirim: float = dataclasses.field(default_factory=time.time)
+    waktu_mulai: float = None
+    waktu_selesai: float = None
+
+    @property
+    def aktif(self):
+        return self.status in ("antri", "jalan")
+
+
+def _siapkan_pekerja(kabar):
+    global _kabar
+    _kabar = kabar
+
+
+def proses_pekerjaan(id_pekerjaan, cabang_sby_path, sby_cabang_path, selisih_sebelumnya=0, opsi=None,
+                     ukur_memori=False, log_jsonl=None, berkas_profil=None):
+    """
+    Dijalankan di proses pekerja: proses_rekonsiliasi atas kedua file (path,
+    bukan isi file, agar unggahan besar tidak di-pickle ke pekerja) dengan
+    `opsi` (argumen kata kunci tambahan, mis. `tujuan` berkas hasil). Bila
+    `opsi` berisi gantungan, simpanan langsung diperbarui dan
+    hasil["gantungan"] berisi jumlah baris terpakai/baru saja. Dengan opsi "ukuran_potongan" file
+    diproses lewat proses_rekonsiliasi_potongan (mode hemat memori).
+    """
+    opsi = dict(opsi or {})
+    ukuran_potongan = opsi.pop("ukuran_potongan", None)
+    jalankan = proses_rekonsiliasi
+    if ukuran_potongan:
+        jalankan = functools.partial(proses_rekonsiliasi_potongan, ukuran_potongan=ukuran_potongan)
+    _kabar.put((id_pekerjaan, "mulai", None))
+    pencatat = PencatatTahap(
+        ukur_memori=ukur_memori, log_jsonl=log_jsonl, id_proses=id_pekerjaan,
+        saat_tahap=lambda nama, catatan: _kabar.put((id_pekerjaan, nama, dict(catatan))),
+    )
+    argumen = (cabang_sby_path, sby_cabang_path, selisih_sebelumnya)
+    if berkas_profil:
+        with cProfile.Profile() as profiler:
+            hasil = jalankan(*argumen, pencatat=pencatat, **opsi)
+        profiler.dump_stats(berkas_profil)
+    else:
+        hasil = jalankan(*argumen, pencatat=pencatat, **opsi)
+    if "gantungan" in hasil:
+        gantungan = hasil.pop("gantungan")
+        opsi["gantungan"].simpan(opsi["periode"], gantungan["terpakai"], gantungan["baru"])
+        hasil["gantungan"] = {"terpakai": len(gantungan["terpakai"]), "baru": len(gantungan["baru"])}
+    return hasil
+
+
+class AntrianPekerjaan:
+    """
+    Pool proses bersama untuk seluruh sesi. `kirim` mengembalikan id
+    pekerjaan; status, posisi antrian dan hasilnya dibaca lewat `ambil` dan
+    `posisi`.
+    """
+
+    def __init__(self, maks_pekerja=MAKS_PEKERJA, maks_antrian=MAKS_ANTRIAN):
+        self.maks_pekerja = maks_pekerja
+        self.maks_antrian = maks_antrian
+        # "spawn": proses pekerja tidak mewarisi thread server Streamlit.
+        self._konteks = multiprocessing.get_context("spawn")
+        self._kabar = self._konteks.Queue()
+        self._pool = self._buat_pool()
+        self._pekerjaan = {}
+        self._future = {}
+        self._urutan = itertools.count()
+        self._kunci = threading.Lock()
+        threading.Thread(target=self._dengar, name="antrian-rk", daemon=True).start()
+
+    def _buat_pool(self):
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.maks_pekerja, mp_context=self._konteks, initializer=_siapkan_pekerja,
+            initargs=(self._kabar,),
+        )
+
+    def _ganti_pool(self, rusak):
+        """
+        Pekerja yang mati mendadak (mis. kehabisan memori) membuat pool rusak
+        permanen; ganti dengan pool baru. Dipanggil dengan self._kunci terpegang.
+        """
+        if self._pool is rusak:
+            rusak.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._buat_pool()
+
+    def _dengar(self):
+        """
+        Terapkan kabar kemajuan dari pekerja ke objek Pekerjaan. Kabar yang
+        gagal diterapkan hanya dilewati: bila thread ini berhenti, status semua
+        pekerjaan berikutnya tidak pernah berubah dari "antri".
+        """
+        while True:
+            try:
+                self._terapkan_kabar(*self._kabar.get())
+            except (EOFError, OSError):
+                return   # antrian kabar sudah ditutup
+            except Exception:
+                traceback.print_exc()
+
+    def _terapkan_kabar(self, id_pekerjaan, nama, catatan):
+        with self._kunci:
+            pekerjaan = self._pekerjaan.get(id_pekerjaan)
+            if pekerjaan is None or not pekerjaan.aktif:
+                return
+            if nama == "mulai":
+                pekerjaan.status, pekerjaan.waktu_mulai = "jalan", time.time()
+                return
+            if nama not in TAHAP_PIPELINE:
+                return
+            pekerjaan.tahap = nama
+            urutan = TAHAP_PIPELINE.index(nama) + ("detik" in catatan)
+            pekerjaan.kemajuan = max(pekerjaan.kemajuan, urutan / len(TAHAP_PIPELINE))
+            if "detik" in catatan:
+                pekerjaan.catatan.append(catatan)
+
+    def _selesai(self, pekerjaan, pool, future, saat_selesai):
+        with self._kunci:
+            pekerjaan.waktu_selesai = time.time()
+            if future.cancelled():
+                pekerjaan.status = "batal"
+            elif isinstance(future.exception(), concurrent.futures.process.BrokenProcessPool):
+                # Semua pekerjaan di pool itu (berjalan maupun menunggu) ikut gagal.
+                pekerjaan.status = "gagal"
+                pekerjaan.galat = "Proses pekerja berhenti mendadak (mis. kehabisan memori); silakan kirim ulang."
+                self._ganti_pool(pool)
+            elif future.exception() is not None:
+                e = future.exception()
+                pekerjaan.status, pekerjaan.galat = "gagal", f"{type(e).__name__}: {e}"
+                pekerjaan.jejak = "".join(traceback.format_exception(e))
+            else:
+                pekerjaan.status, pekerjaan.hasil, pekerjaan.kemajuan = "selesai", future.result(), 1.0
+        if saat_selesai and pekerjaan.status == "selesai":
+            saat_selesai(pekerjaan)
+
+    def _bersihkan(self):
+        batas = time.time() - SIMPAN_HASIL_DETIK
+        for id_lama in [i for i, p in self._pekerjaan.items() if not p.aktif and p.waktu_selesai < batas]:
+            del self._pekerjaan[id_lama]
+            self._future.pop(id_lama, None)
+
+    def kirim(self, *argumen, saat_selesai=None, **opsi):
+        """
+        Antrekan proses_pekerjaan(id, *argumen, **opsi). `saat_selesai(pekerjaan)`
+        dipanggil (di thread lain) bila pekerjaan selesai tanpa error.
+        Melempar AntrianPenuh bila kapasitas antrian habis.
+        """
+        with self._kunci:
+            self._bersihkan()
+            if sum(p.aktif for p in self._pekerjaan.values()) >= self.maks_antrian:
+                raise AntrianPenuh(f"Antrian penuh ({self.maks_antrian} pekerjaan); coba beberapa saat lagi.")
+            id_pekerjaan = uuid.uuid4().hex[:12]
+            try:
+                future = self._pool.submit(proses_pekerjaan, id_pekerjaan, *argumen, **opsi)
+            except concurrent.futures.process.BrokenProcessPool:
+                self._ganti_pool(self._pool)
+                future = self._pool.submit(proses_pekerjaan, id_pekerjaan, *argumen, **opsi)
+            # Baru didaftarkan setelah submit berhasil, agar tidak ada pekerjaan "antri" tanpa future.
+            pool = self._pool
+            pekerjaan = Pekerjaan(id=id_pekerjaan, urutan=next(self._urutan))
+            self._pekerjaan[pekerjaan.id] = pekerjaan
+            self._future[pekerjaan.id] = future
+        future.add_done_callback(lambda f: self._selesai(pekerjaan, pool, f, saat_selesai))
+        return pekerjaan.id
+
+    def ambil(self, id_pekerjaan):
+        """Objek Pekerjaan, atau None bila tidak dikenal/sudah dibuang."""
+        return self._pekerjaan.get(id_pekerjaan)
+
+    def posisi(self, id_pekerjaan):
+        """(posisi, jumlah) di antara pekerjaan yang masih menunggu; posisi 0 = tidak sedang menunggu."""
+        with self._kunci:
+            menunggu = sorted((p for p in self._pekerjaan.values() if p.status == "antri"), key=lambda p: p.urutan)
+            ids = [p.id for p in menunggu]
+        return (ids.index(id_pekerjaan) + 1 if id_pekerjaan in ids else 0), len(ids)
+
+    def batalkan(self, id_pekerjaan):
+        """Batalkan pekerjaan yang belum mulai; True bila berhasil."""
+        future = self._future.get(id_pekerjaan)
+        return bool(future and future.cancel())
+
+    def beban(self):
+        """(berjalan, menunggu) saat ini."""
+        with self._kunci:
+            status = [p.status for p in self._pekerjaan.values()]
+        return status.count("jalan"), status.count("antri")
@@ -0,0 +1,219 @@
+"""
+Rekonsiliasi banyak cabang sekaligus tanpa Streamlit.
+
+Folder masukan berisi pasangan file per cabang. Nama file (tanpa ekstensi,
+huruf besar, pemisah apa pun dianggap "_") menentukan sisinya:
+
+    MKS_SBY.csv / "MKS - SBY.csv"   -> CABANG - SBY cabang MKS
+    SBY_MKS.csv / "SBY - MKS.csv"   -> SBY - CABANG cabang MKS
+
+File boleh berformat .csv, .xlsx atau .ods.
+
+Nama CABANG_SBY / SBY_CABANG (seperti keluaran rk_sintetis) memakai nama
+subfolder sebagai nama cabang. Setiap cabang diproses di proses terpisah
+(ProcessPoolExecutor); hasilnya satu berkas per cabang ditambah
+ringkasan_RK.xlsx berisi satu baris per cabang.
+
+    python rk_batch.py data_bulan_ini --keluaran hasil_RK --proses 4
+
+Untuk file yang tidak muat di memori, --potongan N membaca file per N baris
+dan menampung baris kerja di disk (lihat rk_potongan).
+"""
+import argparse
+import concurrent.futures
+import os
+import re
+import time
+
+import pandas as pd
+
+from rk_gantungan import GudangGantungan
+from rk_pipeline import (
+    BATAS_WAKTU_DETIK, FORMAT_EKSPOR, FORMAT_MASUKAN, JENDELA_TANGGAL_HARI, KOLOM_PARTISI, proses_rekonsiliasi,
+)
+from rk_potongan import FORMAT_POTONGAN, proses_rekonsiliasi_potongan
+
+EKSTENSI_MASUKAN = tuple(f".{ekstensi}" for ekstensi in FORMAT_MASUKAN)
+POLA_CABANG_SBY = re.compile(r"^(?P<cabang>.+)_SBY$")
+POLA_SBY_CABANG = re.compile(r"^SBY_(?P<cabang>.+)$")
+NAMA_RINGKASAN = "ringkasan_RK.xlsx"
+
+
+def _kenali(folder, nama_file):
+    """(cabang, sisi) dari nama file, atau None bila bukan file rekonsiliasi."""
+    batang, ekstensi = os.path.splitext(nama_file)
+    if ekstensi.lower() not in EKSTENSI_MASUKAN:
+        return None
+    batang = re.sub(r"[^0-9A-Z]+", "_", batang.upper()).strip("_")
+    for sisi, pola in (("sby_cabang", POLA_SBY_CABANG), ("cabang_sby", POLA_CABANG_SBY)):
+        cocok = pola.match(batang)
+        if cocok:
+            cabang = cocok["cabang"]
+            if cabang == "CABANG":
+                cabang = os.path.basename(os.path.normpath(folder)).upper()
+            return cabang, sisi
+    return None
+
+
+def cari_pasangan(folder):
+    """
+    Telusuri `folder` (termasuk subfolder) dan kembalikan
+    {cabang: {"cabang_sby": path, "sby_cabang": path}}. Cabang yang filenya
+    tidak lengkap tetap dikembalikan agar bisa dilaporkan.
+    """
+    pasangan = {}
+    for akar, _, daftar_file in os.walk(folder):
+        for nama_file in sorted(daftar_file):
+            dikenali = _kenali(akar, nama_file)
+            if dikenali is None:
+                continue
+            cabang, sisi = dikenali
+            sudah = pasangan.setdefault(cabang, {}).get(sisi)
+            if sudah:
+                raise ValueError(f"Cabang {cabang}: lebih dari satu file {sisi} ({sudah}, {nama_file})")
+            pasangan[cabang][sisi] = os.path.join(akar, nama_file)
+    return dict(sorted(pasangan.items()))
+
+
+def proses_cabang(cabang, files, folder_keluaran, selisih_sebelumnya=0, format_ekspor="xlsx",
+                  batas_waktu=BATAS_WAKTU_DETIK, folder_gantungan=None, periode=None, partisi=None,
+                  jendela_hari=JENDELA_TANGGAL_HARI, ukuran_potongan=None):
+    """
+    Rekonsiliasi satu cabang dan tulis hasilnya ke `folder_keluaran`.
+    Dijalankan di proses pekerja; error dikembalikan sebagai status, bukan dilempar.
+    Offset per partisi berjalan berurutan karena core sudah dipakai per cabang.
+    Dengan `ukuran_potongan` cabang diproses lewat proses_rekonsiliasi_potongan
+    (berkas tumpahan sementara di `folder_keluaran`).
+    """
+    baris = {"Cabang": cabang, "Status": "gagal", "Berkas": None, "Pesan": None}
+    mulai = time.perf_counter()
+    try:
+        kurang = [sisi for sisi in ("cabang_sby", "sby_cabang") if sisi not in files]
+        if kurang:
+            raise FileNotFoundError(f"file {', '.join(kurang)} tidak ditemukan")
+        gantungan = None
+        if folder_gantungan:
+            # Satu berkas per cabang agar cabang yang diproses paralel tidak berebut kunci SQLite.
+            gantungan = GudangGantungan(cabang, os.path.join(folder_gantungan, f"gantungan_{cabang}.sqlite"))
+        berkas = os.path.join(folder_keluaran, f"hasil_RK_{cabang}.{FORMAT_EKSPOR[format_ekspor]['ekstensi']}")
+        if ukuran_potongan:
+            hasil = proses_rekonsiliasi_potongan(
+                files["cabang_sby"], files["sby_cabang"], selisih_sebelumnya,
+                batas_waktu=batas_waktu, format_ekspor=format_ekspor, ukuran_potongan=ukuran_potongan,
+                folder=folder_keluaran, tujuan=berkas,
+            )
+        else:
+            hasil = proses_rekonsiliasi(
+                files["cabang_sby"], files["sby_cabang"], selisih_sebelumnya,
+                batas_waktu=batas_waktu, format_ekspor=format_ekspor, gantungan=gantungan, periode=periode,
+                partisi=partisi, jendela_hari=jendela_hari, proses=1, tujuan=berkas,
+            )
+        if gantungan is not None:
+            gantungan.simpan(periode, hasil["gantungan"]["terpakai"], hasil["gantungan"]["baru"])
+
+        grup = hasil["ringkasan"].set_index(["Lembar", "Grup"])
+        d1, d2 = grup.loc[("cabang_sby", "D1")], grup.loc[("sby_cabang", "D2")]
+        baris.update({
+            "Status": "waktu habis" if hasil["waktu_habis"] else "selesai",
+            "Berkas": os.path.basename(berkas),
+            "Baris CABANG-SBY": int(grup.loc["cabang_sby", "Baris"].sum()),
+            "Baris SBY-CABANG": int(grup.loc["sby_cabang", "Baris"].sum()),
+            "Baris OFFSET": int(grup.xs("C1", level="Grup")["Baris"].sum()),
+            "Baris GANTUNG CABANG-SBY": int(d1["Baris"]),
+            "GANTUNG CABANG-SBY (Debet - Kredit)": d1["Debet"] - d1["Kredit"],
+            "Baris GANTUNG SBY-CABANG": int(d2["Baris"]),
+            "GANTUNG SBY-CABANG (Debet - Kredit)": d2["Debet"] - d2["Kredit"],
+            "Baris GANTUNG ambigu": hasil["ambigu"],
+        })
+    except Exception as e:
+        baris["Pesan"] = f"{type(e).__name__}: {e}"
+    baris["Detik"] = round(time.perf_counter() - mulai, 2)
+    return baris
+
+
+def baca_selisih(path):
+    """{cabang: selisih} dari file CSV dua kolom (cabang, selisih periode sebelumnya)."""
+    df = pd.read_csv(path, sep=None, engine="python", dtype=str)
+    cabang = df.iloc[:, 0].str.strip().str.upper()
+    return dict(zip(cabang, pd.to_numeric(df.iloc[:, 1].str.replace(",", ""))))
+
+
+def jalankan_batch(folder, folder_keluaran, proses=None, format_ekspor="xlsx", batas_waktu=BATAS_WAKTU_DETIK,
+                   selisih=None, folder_gantungan=None, periode=None, partisi=None,
+                   jendela_hari=JENDELA_TANGGAL_HARI, ukuran_potongan=None, saat_selesai=None):
+    """
+    Rekonsiliasi seluruh cabang di `folder` secara paralel (`proses` pekerja,
+    bawaan os.cpu_count()). Menulis berkas per cabang dan ringkasan_RK.xlsx
+    ke `folder_keluaran`, lalu mengembalikan ringkasan sebagai DataFrame.
+    `saat_selesai(baris)` dipanggil setiap kali satu cabang selesai.
+    """
+    pasangan = cari_pasangan(folder)
+    if not pasangan:
+        raise FileNotFoundError(f"Tidak ada file rekonsiliasi di {folder}")
+    os.makedirs(folder_keluaran, exist_ok=True)
+    if folder_gantungan:
+        os.makedirs(folder_gantungan, exist_ok=True)
+    selisih = selisih or {}
+
+    ringkasan = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=proses) as pool:
+        tugas = [
+            pool.submit(
+                proses_cabang, cabang, files, folder_keluaran, selisih.get(cabang, 0), format_ekspor,
+                batas_waktu, folder_gantungan, periode, partisi, jendela_hari, ukuran_potongan,
+            )
+            for cabang, files in pasangan.items()
+        ]
+        for selesai in concurrent.futures.as_completed(tugas):
+            ringkasan.append(selesai.result())
+            if saat_selesai:
+                saat_selesai(ringkasan[-1])
+
+    ringkasan = pd.DataFrame(ringkasan).sort_values("Cabang", ignore_index=True)
+    kolom_awal = ["Cabang", "Status", "Detik", "Berkas"]
+    ringkasan = ringkasan[kolom_awal + [c for c in ringkasan.columns if c not in kolom_awal + ["Pesan"]] + ["Pesan"]]
+    with pd.ExcelWriter(os.path.join(folder_keluaran, NAMA_RINGKASAN), engine="xlsxwriter") as writer:
+        ringkasan.to_excel(writer, sheet_name="ringkasan", index=False)
+    return ringkasan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rekonsiliasi CABANG - SBY untuk banyak cabang sekaligus.")
+    parser.add_argument("folder", help="folder berisi pasangan file per cabang")
+    parser.add_argument("--keluaran", default="hasil_RK", help="folder hasil (default: hasil_RK)")
+    parser.add_argument("--proses", type=int, default=None, help="jumlah proses pekerja (default: jumlah core)")
+    parser.add_argument("--format", default="xlsx", choices=list(FORMAT_EKSPOR))
+    parser.add_argument("--batas-waktu", type=float, default=BATAS_WAKTU_DETIK,
+                        help="batas waktu pencarian offset per cabang (detik)")
+    parser.add_argument("--selisih", help="CSV cabang,selisih periode sebelumnya (rupiah)")
+    parser.add_argument("--gantungan", help="folder simpanan gantungan per cabang (butuh --periode)")
+    parser.add_argument("--periode", help="periode YYYY-MM untuk simpanan gantungan")
+    parser.add_argument("--partisi", nargs="+", choices=KOLOM_PARTISI, metavar="KOLOM",
+                        help=f"cari offset per partisi kolom ini dulu: {', '.join(KOLOM_PARTISI)}")
+    parser.add_argument("--jendela-hari", type=int, default=JENDELA_TANGGAL_HARI,
+                        help="lebar jendela bila partisi memakai tanggal")
+    parser.add_argument("--potongan", type=int, metavar="N",
+                        help="mode hemat memori: baca file per N baris, baris kerja ditampung di disk")
+    args = parser.parse_args(argv)
+    if args.gantungan and not (args.periode and re.fullmatch(r"\d{4}-\d{2}", args.periode)):
+        parser.error("--gantungan membutuhkan --periode berformat YYYY-MM")
+    if args.potongan and (args.gantungan or args.partisi or args.format not in FORMAT_POTONGAN):
+        parser.error(f"--potongan tidak bisa digabung dengan --gantungan/--partisi; format: {', '.join(FORMAT_POTONGAN)}")
+
+    def cetak(baris):
+        print(f"{baris['Cabang']:<12} {baris['Status']:<12} {baris['Detik']:>8.2f} detik  {baris['Pesan'] or ''}")
+
+    mulai = time.perf_counter()
+    ringkasan = jalankan_batch(
+        args.folder, args.keluaran, args.proses, args.format, args.batas_waktu,
+        baca_selisih(args.selisih) if args.selisih else None, args.gantungan, args.periode,
+        args.partisi, args.jendela_hari, args.potongan, saat_selesai=cetak,
+    )
+    gagal = (ringkasan["Status"] == "gagal").sum()
+    print(f"{len(ringkasan)} cabang dalam {time.perf_counter() - mulai:.1f} detik, {gagal} gagal. "
+          f"Ringkasan: {os.path.join(args.keluaran, NAMA_RINGKASAN)}")
+    return 1 if gagal else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
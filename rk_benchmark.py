@@ -0,0 +1,120 @@
+"""
+Benchmark pipeline rekonsiliasi dengan data sintetis (rk_sintetis).
+
+Setiap ukuran dijalankan lewat proses_rekonsiliasi dengan PencatatTahap,
+lalu dicetak durasi, throughput (baris masuk per detik) dan, dengan
+--memori, puncak memori per tahap (baca, klasifikasi, cocok_id, offset,
+ekspor). Ukuran frame kerja dengan skema ringkas (category, datetime64,
+tanpa kolom "index") dibandingkan dengan skema teks semua kolom. Dengan
+--potongan N yang diukur adalah mode hemat memori (rk_potongan).
+
+    python rk_benchmark.py --ukuran 1000 10000 100000 --memori --jsonl hasil_bench.jsonl
+    python rk_benchmark.py --ukuran 1000000 --memori --potongan 200000
+"""
+import argparse
+import io
+import json
+import time
+
+from rk_pipeline import (
+    BATAS_WAKTU_DETIK, FORMAT_EKSPOR, KOLOM_PARTISI, PencatatTahap, baca_tabel, columns, parse_nominal,
+    proses_rekonsiliasi, siapkan_data, ukuran_frame,
+)
+from rk_potongan import proses_rekonsiliasi_potongan
+from rk_sintetis import buat_pasangan, ke_csv
+
+UKURAN_BAWAAN = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def memori_skema(*isi_csv):
+    """(MB skema teks, MB skema ringkas) frame kerja dari isi file CSV."""
+    teks = ringkas = 0
+    for isi in isi_csv:
+        mentah = baca_tabel(io.BytesIO(isi), columns)
+        # Skema lama: semua kolom teks + kolom "index", nominal int64 sen.
+        lama = mentah.reset_index()
+        lama["Debet"], lama["Kredit"] = parse_nominal(lama["Debet"]), parse_nominal(lama["Kredit"])
+        teks += ukuran_frame(lama)
+        del lama
+        ringkas += ukuran_frame(siapkan_data(mentah))
+    return teks / 2**20, ringkas / 2**20
+
+
+def jalankan(n_baris, ukur_memori=False, format_ekspor="xlsx", batas_waktu=BATAS_WAKTU_DETIK, seed=0,
+             partisi=None, proses=None, ukuran_potongan=None):
+    """
+    Jalankan satu benchmark; kembalikan daftar catatan tahap (dict) untuk
+    `n_baris` per file, diakhiri catatan "total" dan "skema" (ukuran frame).
+    Dengan `ukuran_potongan` yang dijalankan proses_rekonsiliasi_potongan.
+    """
+    cabang_sby, sby_cabang = buat_pasangan(n_baris, seed=seed)
+    cabang_bytes, sby_bytes = ke_csv(cabang_sby), ke_csv(sby_cabang)
+    del cabang_sby, sby_cabang
+
+    pencatat = PencatatTahap(ukur_memori=ukur_memori)
+    mulai = time.perf_counter()
+    if ukuran_potongan:
+        hasil = proses_rekonsiliasi_potongan(
+            io.BytesIO(cabang_bytes), io.BytesIO(sby_bytes),
+            batas_waktu=batas_waktu, format_ekspor=format_ekspor, pencatat=pencatat, ukuran_potongan=ukuran_potongan,
+        )
+    else:
+        hasil = proses_rekonsiliasi(
+            io.BytesIO(cabang_bytes), io.BytesIO(sby_bytes),
+            batas_waktu=batas_waktu, format_ekspor=format_ekspor, pencatat=pencatat, partisi=partisi, proses=proses,
+        )
+    total = time.perf_counter() - mulai
+
+    catatan = []
+    for c in pencatat.catatan:
+        baris = c.get("baris_masuk", c.get("baris_keluar", 0))
+        catatan.append(dict(c, n_baris=n_baris, baris_per_detik=baris / c["detik"] if c["detik"] else None))
+    catatan.append({
+        "tahap": "total", "n_baris": n_baris, "detik": total,
+        "baris_per_detik": 2 * n_baris / total, "waktu_habis": hasil["waktu_habis"], "ambigu": hasil["ambigu"],
+    })
+    memori_teks, memori_ringkas = memori_skema(cabang_bytes, sby_bytes)
+    catatan.append({"tahap": "skema", "n_baris": n_baris, "memori_teks_mb": memori_teks,
+                    "memori_ringkas_mb": memori_ringkas})
+    return catatan
+
+
+def _cetak(catatan):
+    print(f"{'n_baris':>10} {'tahap':<12} {'detik':>9} {'baris/detik':>13} {'puncak MB':>10}")
+    for c in catatan:
+        if c["tahap"] == "skema":
+            hemat = 1 - c["memori_ringkas_mb"] / c["memori_teks_mb"]
+            print(f"{'':>10} frame kerja: skema teks {c['memori_teks_mb']:.1f} MB -> "
+                  f"skema ringkas {c['memori_ringkas_mb']:.1f} MB ({hemat:.0%} lebih kecil)")
+            continue
+        throughput = f"{c['baris_per_detik']:,.0f}" if c.get("baris_per_detik") else "-"
+        memori = f"{c['puncak_memori_mb']:.1f}" if "puncak_memori_mb" in c else "-"
+        print(f"{c['n_baris']:>10,} {c['tahap']:<12} {c['detik']:>9.3f} {throughput:>13} {memori:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline rekonsiliasi dengan data sintetis.")
+    parser.add_argument("--ukuran", type=int, nargs="+", default=UKURAN_BAWAAN, help="baris per file")
+    parser.add_argument("--memori", action="store_true", help="ukur puncak memori per tahap (lebih lambat)")
+    parser.add_argument("--format", default="xlsx", choices=list(FORMAT_EKSPOR))
+    parser.add_argument("--batas-waktu", type=float, default=BATAS_WAKTU_DETIK)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--partisi", nargs="+", choices=KOLOM_PARTISI, metavar="KOLOM",
+                        help="ukur offset per partisi kolom ini")
+    parser.add_argument("--proses", type=int, default=None, help="pekerja offset per partisi")
+    parser.add_argument("--potongan", type=int, metavar="N", help="ukur mode hemat memori (baca per N baris)")
+    parser.add_argument("--jsonl", help="tambahkan hasil ke berkas JSON lines ini")
+    args = parser.parse_args(argv)
+
+    for n_baris in args.ukuran:
+        catatan = jalankan(n_baris, args.memori, args.format, args.batas_waktu, args.seed, args.partisi, args.proses,
+                           args.potongan)
+        _cetak(catatan)
+        if args.jsonl:
+            with open(args.jsonl, "a", encoding="utf-8") as berkas:
+                for c in catatan:
+                    berkas.write(json.dumps(c) + "\n")
+
+
+if __name__ == "__main__":
+    main()
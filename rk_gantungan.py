@@ -0,0 +1,151 @@
+"""
+Penyimpanan baris GANTUNG (D1/D2) antar periode.
+
+Baris yang belum menemukan pasangan disimpan di SQLite lokal beserta
+nominalnya dalam sen (Debet - Kredit), dengan indeks pada nominal. Periode
+berikutnya hanya mengambil baris tersimpan yang nominalnya menutup nominal
+baris sisa baru (nilai berlawanan), sehingga beban per periode mengikuti
+jumlah transaksi baru, bukan panjang riwayat.
+
+Setiap baris membawa kode cabang: satu berkas simpanan boleh dipakai
+beberapa cabang, tetapi baris satu cabang tidak pernah meng-offset atau
+menghapus baris cabang lain.
+
+Periode ditulis "YYYY-MM" agar urutan teks sama dengan urutan waktu.
+Menyimpan ulang periode yang sama (untuk cabang yang sama) menggantikan
+hasil sebelumnya.
+"""
+import contextlib
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from rk_pipeline import columns, teks_sel, terapkan_skema
+
+LOKASI_BAWAAN = "gantungan.sqlite"
+
+# Kolom yang disimpan sebagai JSON; Debet/Kredit punya kolom sendiri (sen).
+KOLOM_DATA = ["index"] + [col for col in columns if col not in ("Debet", "Kredit")]
+
+SKEMA = """
+CREATE TABLE IF NOT EXISTS gantungan (
+    id INTEGER PRIMARY KEY,
+    cabang TEXT NOT NULL,
+    sisi TEXT NOT NULL,
+    periode TEXT NOT NULL,
+    nominal INTEGER NOT NULL,
+    debet INTEGER NOT NULL,
+    kredit INTEGER NOT NULL,
+    periode_cocok TEXT,
+    data TEXT NOT NULL
+);
+"""
+
+INDEKS = """
+CREATE INDEX IF NOT EXISTS gantungan_cabang_nominal ON gantungan (cabang, nominal);
+CREATE INDEX IF NOT EXISTS gantungan_cabang_periode ON gantungan (cabang, periode);
+"""
+
+# Simpanan lama tanpa kolom cabang: cabang barisnya tidak diketahui, jadi diberi
+# "" (tidak bisa dipakai cabang mana pun) alih-alih ditebak.
+MIGRASI_CABANG = """
+ALTER TABLE gantungan ADD COLUMN cabang TEXT NOT NULL DEFAULT '';
+DROP INDEX IF EXISTS gantungan_nominal;
+DROP INDEX IF EXISTS gantungan_periode;
+"""
+
+
+class GudangGantungan:
+    """
+    Simpanan baris GANTUNG cabang `cabang` di SQLite `lokasi`. `periode_cocok`
+    berisi periode yang memakai baris tersebut sebagai pasangan offset (NULL
+    selama masih gantung).
+    """
+
+    def __init__(self, cabang, lokasi=LOKASI_BAWAAN):
+        self.cabang = str(cabang).strip().upper()
+        if not self.cabang:
+            raise ValueError("Kode cabang simpanan gantungan wajib diisi")
+        self.lokasi = lokasi
+        with self._sambung() as con:
+            con.executescript(SKEMA)
+            if "cabang" not in {kolom[1] for kolom in con.execute("PRAGMA table_info(gantungan)")}:
+                con.executescript(MIGRASI_CABANG)
+            con.executescript(INDEKS)
+
+    @contextlib.contextmanager
+    def _sambung(self):
+        """Koneksi baru dalam satu transaksi; ditutup setelah dipakai."""
+        con = sqlite3.connect(self.lokasi)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def kandidat(self, nominal, periode):
+        """
+        Baris tersimpan cabang ini sebelum `periode` yang masih gantung (atau dipakai oleh
+        `periode` itu sendiri) dan nominalnya berlawanan dengan salah satu
+        `nominal` (sen). Mengembalikan DataFrame kolom laporan (skema
+        ringkas) + "sisi" dan "id_gantungan", Debet/Kredit dalam sen.
+        """
+        dicari = np.unique(-np.asarray(nominal, dtype=np.int64))
+        dicari = dicari[dicari != 0]
+        with self._sambung() as con:
+            con.execute("CREATE TEMP TABLE dicari (nominal INTEGER PRIMARY KEY)")
+            con.executemany("INSERT INTO dicari VALUES (?)", ((int(n),) for n in dicari))
+            baris = con.execute(
+                "SELECT g.id, g.sisi, g.debet, g.kredit, g.data FROM dicari d"
+                " JOIN gantungan g ON g.nominal = d.nominal"
+                " WHERE g.cabang = ? AND g.periode < ? AND (g.periode_cocok IS NULL OR g.periode_cocok = ?)"
+                " ORDER BY g.id",
+                (self.cabang, periode, periode),
+            ).fetchall()
+        hasil = terapkan_skema(pd.DataFrame([json.loads(b[4]) for b in baris], columns=KOLOM_DATA))
+        hasil["Debet"] = np.array([b[2] for b in baris], dtype=np.int64)
+        hasil["Kredit"] = np.array([b[3] for b in baris], dtype=np.int64)
+        hasil["sisi"] = [b[1] for b in baris]
+        hasil["id_gantungan"] = np.array([b[0] for b in baris], dtype=np.int64)
+        return hasil
+
+    def simpan(self, periode, terpakai, baru):
+        """
+        Catat hasil `periode`: id_gantungan `terpakai` ditandai cocok dan baris
+        GANTUNG `baru` (DataFrame dengan kolom "sisi", Debet/Kredit sen)
+        ditambahkan. Hasil simpanan `periode` yang sama sebelumnya (cabang ini
+        saja) diganti.
+        """
+        with self._sambung() as con:
+            con.execute("DELETE FROM gantungan WHERE cabang = ? AND periode = ?", (self.cabang, periode))
+            con.execute(
+                "UPDATE gantungan SET periode_cocok = NULL WHERE cabang = ? AND periode_cocok = ?",
+                (self.cabang, periode),
+            )
+            con.executemany(
+                "UPDATE gantungan SET periode_cocok = ? WHERE id = ? AND cabang = ?",
+                ((periode, int(i), self.cabang) for i in terpakai),
+            )
+            data = baru.reindex(columns=KOLOM_DATA).astype(object)
+            data = data.where(data.notna(), None)
+            con.executemany(
+                "INSERT INTO gantungan (cabang, sisi, periode, nominal, debet, kredit, data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (self.cabang, sisi, periode, int(d) - int(k), int(d), int(k), json.dumps(isi, default=teks_sel))
+                    for sisi, d, k, isi in zip(
+                        baru["sisi"], baru["Debet"], baru["Kredit"], data.to_dict("records")
+                    )
+                ),
+            )
+
+    def ringkasan(self):
+        """Jumlah baris dan total (rupiah) cabang ini yang masih gantung, per sisi."""
+        with self._sambung() as con:
+            return pd.read_sql_query(
+                "SELECT sisi, COUNT(*) AS baris, SUM(debet) / 100.0 AS Debet, SUM(kredit) / 100.0 AS Kredit"
+                " FROM gantungan WHERE cabang = ? AND periode_cocok IS NULL GROUP BY sisi ORDER BY sisi",
+                con, params=(self.cabang,),
+            )
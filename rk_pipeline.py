@@ -0,0 +1,1441 @@
+"""
+Pipeline rekonsiliasi hutang/piutang afiliasi CABANG - SBY.
+
+Semua tahap (baca CSV/XLSX/ODS, klasifikasi, pencocokan ID, offset, susun laporan,
+ekspor Excel) berupa fungsi murni tanpa Streamlit, sehingga hasilnya bisa
+di-cache oleh app2.py dan dipakai ulang dari skrip lain.
+"""
+import pandas as pd
+import numpy as np
+import io
+import os
+import bisect
+import time
+import csv
+import re
+import zipfile
+import contextlib
+import itertools
+import concurrent.futures
+import tracemalloc
+import datetime
+import json
+import xml.etree.ElementTree as ET
+
+import openpyxl
+import xlsxwriter
+
+try:
+    import pyarrow  # (opsional, parser CSV multi-thread)
+    import pyarrow.csv
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+columns = [
+    'Tanggal Kasir', 'ID Dokumen', 'Nomor Dokumen', 'Dibayarkan (ke/dari)', 'Keperluan', 'Vessel Voyage',
+    'Debet', 'Kredit', 'Tempat Pembayaran', 'Pembuat', 'Sumber Dokumen', 'Jenis Dokumen',
+    'Tanggal Delivery', 'Nama Kode', 'Kode Accounting', 'User Pengakuan', 'Unit', 'Divisi',
+    'Flag KBM/KDRT', 'Target_First', 'Target_Jenis', 'Target_Second'
+]
+
+columns_final = [
+    'Grup',
+    'index', 'Tanggal Kasir', 'ID Dokumen', 'Nomor Dokumen', 'Dibayarkan (ke/dari)', 'Keperluan',
+    'Vessel Voyage', 'Debet', 'Kredit', 'Tempat Pembayaran', 'Pembuat', 'Sumber Dokumen',
+    'Jenis Dokumen', 'Tanggal Delivery', 'Nama Kode', 'Kode Accounting', 'User Pengakuan',
+    'Unit', 'Divisi', 'Flag KBM/KDRT', 'Target_First', 'Target_Jenis', 'Target_Second',
+    'Sumber', 'Posisi', 'ID_Offset'
+]
+
+# ---------------------------------------------------------------------
+# SKEMA KOLOM
+# ---------------------------------------------------------------------
+# Kolom berkardinalitas rendah disimpan sebagai category (kode kecil + satu
+# salinan setiap teks); tanggal sebagai datetime64; Debet/Kredit int64 sen.
+# Kolom lain tetap teks.
+KOLOM_KATEGORI = [
+    'Tempat Pembayaran', 'Pembuat', 'Sumber Dokumen', 'Jenis Dokumen', 'Nama Kode', 'Kode Accounting',
+    'User Pengakuan', 'Unit', 'Divisi', 'Flag KBM/KDRT', 'Target_First', 'Target_Jenis', 'Target_Second',
+]
+KOLOM_TANGGAL = ["Tanggal Kasir", "Tanggal Delivery"]
+
+# ---------------------------------------------------------------------
+# PENCATATAN TAHAP
+# ---------------------------------------------------------------------
+# Urutan tahap pipeline, dipakai untuk menghitung kemajuan.
+TAHAP_PIPELINE = ["baca", "klasifikasi", "cocok_id", "gantungan", "offset", "ekspor"]
+
+
+class PencatatTahap:
+    """
+    Mencatat durasi, jumlah baris masuk/keluar dan (opsional) puncak memori
+    setiap tahap pipeline. Puncak memori (alokasi baru selama tahap) diukur
+    dengan tracemalloc, yang memperlambat proses, sehingga hanya aktif
+    selama tahap berjalan dan bila `ukur_memori=True`.
+
+    `saat_tahap(nama, catatan)` dipanggil ketika tahap dimulai (catatan tanpa
+    "detik") dan selesai, misalnya untuk progress bar. Bila `log_jsonl`
+    diisi, setiap catatan juga ditambahkan ke berkas itu sebagai satu baris
+    JSON, diberi `id_proses` dan waktu selesai.
+    """
+
+    def __init__(self, ukur_memori=False, saat_tahap=None, log_jsonl=None, id_proses=None):
+        self.ukur_memori = ukur_memori
+        self.saat_tahap = saat_tahap
+        self.log_jsonl = log_jsonl
+        self.id_proses = id_proses
+        self.catatan = []
+
+    @contextlib.contextmanager
+    def tahap(self, nama, **info):
+        catatan = {"tahap": nama, **info}
+        if self.saat_tahap:
+            self.saat_tahap(nama, catatan)
+        lacak_memori = self.ukur_memori and not tracemalloc.is_tracing()
+        if lacak_memori:
+            tracemalloc.start()
+        mulai = time.perf_counter()
+        try:
+            yield catatan
+        except Exception as e:
+            catatan["galat"] = repr(e)
+            raise
+        finally:
+            catatan["detik"] = time.perf_counter() - mulai
+            if lacak_memori:
+                catatan["puncak_memori_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            self.catatan.append(catatan)
+            self._tulis_log(catatan)
+        if self.saat_tahap:
+            self.saat_tahap(nama, catatan)
+
+    def _tulis_log(self, catatan):
+        if not self.log_jsonl:
+            return
+        baris = {"waktu": datetime.datetime.now().isoformat(timespec="seconds"), "id_proses": self.id_proses, **catatan}
+        with open(self.log_jsonl, "a", encoding="utf-8") as berkas:
+            berkas.write(json.dumps(baris, default=str) + "\n")
+
+
+def _tahap(pencatat, nama, **info):
+    """Context manager tahap; tanpa pencatat hanya menyediakan dict kosong."""
+    if pencatat is None:
+        return contextlib.nullcontext({})
+    return pencatat.tahap(nama, **info)
+
+
+# ---------------------------------------------------------------------
+# PEMBACAAN FILE CSV / XLSX / ODS
+# ---------------------------------------------------------------------
+UKURAN_SAMPEL_CSV = 64 * 1024   # byte awal yang dipakai untuk menebak pemisah
+PEMISAH_CSV = ",;\t|"
+
+
+def _tebak_pemisah(sampel):
+    """Tebak pemisah kolom dari potongan awal file (baris utuh saja)."""
+    if "\n" in sampel:
+        sampel = sampel[:sampel.rindex("\n")]
+    try:
+        return csv.Sniffer().sniff(sampel, delimiters=PEMISAH_CSV).delimiter
+    except csv.Error:
+        baris_pertama = sampel.split("\n", 1)[0]
+        return max(PEMISAH_CSV, key=baris_pertama.count)
+
+
+def baca_csv(file, kolom):
+    """
+    Baca file CSV hasil ekspor dengan parser cepat (C/pyarrow).
+
+    Pemisah ditebak dari beberapa KB pertama saja, lalu hanya kolom yang ada
+    di `kolom` yang dimuat (semua sebagai teks; Debet/Kredit dibersihkan
+    kemudian). Urutan kolom hasil mengikuti `kolom`. `file` boleh berupa
+    objek file (mis. unggahan Streamlit) atau path.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as berkas:
+            return baca_csv(berkas, kolom)
+    opsi, tersedia = _opsi_csv(file, kolom)
+    if CSV_ENGINE == "pyarrow":
+        # pyarrow.csv langsung, bukan pd.read_csv(engine="pyarrow"): engine itu
+        # tetap menebak tipe lalu mengubahnya ke teks, sehingga "007" jadi "7"
+        # dan "2024-01-06" jadi "2024-01-06 00:00:00" bila kolomnya juga berisi jam.
+        tabel = pyarrow.csv.read_csv(
+            file,
+            parse_options=pyarrow.csv.ParseOptions(delimiter=opsi["sep"]),
+            convert_options=pyarrow.csv.ConvertOptions(
+                include_columns=tersedia,
+                column_types={col: pyarrow.string() for col in tersedia},
+                strings_can_be_null=True,
+            ),
+        )
+        return tabel.to_pandas()[tersedia]
+    return pd.read_csv(file, engine=CSV_ENGINE, **opsi)[tersedia]
+
+
+def _opsi_csv(file, kolom):
+    """(argumen pd.read_csv, kolom tersedia) untuk file CSV: pemisah ditebak dari sampel awal."""
+    sampel = file.read(UKURAN_SAMPEL_CSV)
+    file.seek(0)
+    if isinstance(sampel, bytes):
+        sampel = sampel.decode("utf-8-sig", errors="ignore")
+    sampel = sampel.lstrip("\ufeff")
+    pemisah = _tebak_pemisah(sampel)
+
+    header = next(csv.reader([sampel.split("\n", 1)[0].rstrip("\r")], delimiter=pemisah))
+    tersedia = [col for col in kolom if col in header]
+    opsi = {
+        "sep": pemisah,
+        "usecols": tersedia,
+        "dtype": {col: str for col in tersedia},
+        "encoding": "utf-8-sig",
+    }
+    return opsi, tersedia
+
+
+FORMAT_MASUKAN = ("csv", "xlsx", "ods")   # dikenali dari isi berkas, lihat jenis_berkas
+KOLOM_NOMINAL = ("Debet", "Kredit")
+MIME_ODS = b"application/vnd.oasis.opendocument.spreadsheet"
+
+# Namespace ODF yang dipakai content.xml.
+_NS_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+_NS_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+_NS_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+
+def jenis_berkas(file):
+    """
+    "xlsx", "ods" atau "csv" menurut isi awal `file` (objek file biner),
+    bukan nama file, karena unggahan di antrian hanya membawa bytes.
+    """
+    awal = file.read(4)
+    file.seek(0)
+    if awal != b"PK\x03\x04":
+        return "csv"
+    with zipfile.ZipFile(file) as arsip:
+        nama = set(arsip.namelist())
+        mime = arsip.read("mimetype").strip() if "mimetype" in nama else b""
+    file.seek(0)
+    if "xl/workbook.xml" in nama:
+        return "xlsx"
+    if mime == MIME_ODS:
+        return "ods"
+    raise ValueError("Berkas zip bukan workbook XLSX/ODS")
+
+
+def teks_sel(nilai):
+    """Nilai sel (spreadsheet, tanggal) sebagai teks seperti di ekspor CSV (None bila kosong)."""
+    if nilai is None or nilai == "":
+        return None
+    if isinstance(nilai, datetime.datetime):
+        return nilai.date().isoformat() if nilai.time() == datetime.time() else nilai.isoformat(sep=" ")
+    if isinstance(nilai, float) and nilai.is_integer():
+        return str(int(nilai))
+    return str(nilai)
+
+
+def _angka_sel(nilai):
+    """Nilai sel Debet/Kredit sebagai float rupiah; teks dibersihkan seperti parse_nominal."""
+    if isinstance(nilai, (int, float)) and not isinstance(nilai, bool):
+        return float(nilai)
+    teks = "" if nilai is None else str(nilai).strip().replace(",", "")
+    return np.nan if teks in ("", "-") else float(teks)
+
+
+def _kolom_sel(col, daftar):
+    """Array kolom dari list nilai sel, dengan dtype sesuai skema kolom."""
+    if col in KOLOM_NOMINAL:
+        return pd.array(daftar, dtype="float64")
+    if col in KOLOM_KATEGORI:
+        return pd.Categorical(daftar)
+    return pd.array(daftar, dtype="str")
+
+
+def _potongan_baris(baris, kolom, ukuran=None):
+    """
+    DataFrame per `ukuran` baris dari iterator baris sel (baris pertama yang
+    berisi = header; semua baris sekaligus bila `ukuran` None). Hanya kolom
+    di `kolom` yang disimpan, satu list per kolom, sehingga sel kolom lain
+    langsung dibuang; Debet/Kredit langsung menjadi float.
+    """
+    baris = (b for b in baris if any(v is not None for v in b))
+    header = [None if v is None else str(v).strip() for v in next(baris, ())]
+    tersedia = [col for col in kolom if col in header]
+    posisi = [header.index(col) for col in tersedia]
+    ubah = [_angka_sel if col in KOLOM_NOMINAL else teks_sel for col in tersedia]
+    pertama = True
+    while True:
+        isi = [[] for _ in tersedia]
+        n = 0
+        for b in itertools.islice(baris, ukuran):
+            for daftar, p, fungsi in zip(isi, posisi, ubah):
+                daftar.append(fungsi(b[p] if p < len(b) else None))
+            n += 1
+        if n or pertama:
+            yield pd.DataFrame({col: _kolom_sel(col, daftar) for col, daftar in zip(tersedia, isi)})
+        pertama = False
+        if ukuran is None or n < ukuran:
+            return
+
+
+def _baris_ke_frame(baris, kolom):
+    """Seluruh baris sel sebagai satu DataFrame (lihat _potongan_baris)."""
+    return next(_potongan_baris(baris, kolom))
+
+
+def _baris_xlsx(file):
+    """Baris (tuple nilai sel) lembar pertama workbook xlsx, mode read-only (streaming) openpyxl."""
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        lembar = workbook.worksheets[0]
+        # Dimensi di file ekspor sering salah; baca sampai baris terakhir yang benar-benar ada.
+        lembar.reset_dimensions()
+        yield from lembar.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def baca_xlsx(file, kolom):
+    """Baca lembar pertama workbook xlsx secara streaming."""
+    return _baris_ke_frame(_baris_xlsx(file), kolom)
+
+
+def _nilai_sel_ods(sel):
+    jenis = sel.get(_NS_OFFICE + "value-type")
+    if jenis in ("float", "currency", "percentage"):
+        return float(sel.get(_NS_OFFICE + "value"))
+    if jenis == "date":
+        return datetime.datetime.fromisoformat(sel.get(_NS_OFFICE + "date-value"))
+    paragraf = ["".join(p.itertext()) for p in sel.iter(_NS_TEXT + "p")]
+    return "\n".join(paragraf) if paragraf else None
+
+
+def _baris_ods(file):
+    """
+    Baris (list nilai sel) tabel pertama content.xml, di-parse dengan
+    iterparse. Elemen baris dibuang setelah dibaca agar memori tidak
+    tumbuh mengikuti ukuran dokumen.
+    """
+    with zipfile.ZipFile(file) as arsip, arsip.open("content.xml") as konten:
+        induk = []
+        for peristiwa, elemen in ET.iterparse(konten, events=("start", "end")):
+            if peristiwa == "start":
+                induk.append(elemen)
+                continue
+            induk.pop()
+            if elemen.tag == _NS_TABLE + "table":
+                return
+            if elemen.tag != _NS_TABLE + "table-row":
+                continue
+            nilai = []
+            for sel in elemen:
+                if sel.tag not in (_NS_TABLE + "table-cell", _NS_TABLE + "covered-table-cell"):
+                    continue
+                ulang = int(sel.get(_NS_TABLE + "number-columns-repeated", 1))
+                isi = _nilai_sel_ods(sel)
+                # Sel kosong berulang (sisa lebar lembar) cukup ditandai di akhir baris.
+                nilai.extend([isi] * (ulang if isi is not None else min(ulang, 1)))
+            while nilai and nilai[-1] is None:
+                nilai.pop()
+            induk[-1].remove(elemen)
+            if nilai:
+                for _ in range(int(elemen.get(_NS_TABLE + "number-rows-repeated", 1))):
+                    yield nilai
+
+
+def baca_ods(file, kolom):
+    """Baca tabel pertama berkas ods secara streaming (content.xml via iterparse)."""
+    return _baris_ke_frame(_baris_ods(file), kolom)
+
+
+def baca_tabel(file, kolom):
+    """
+    Baca file ekspor CSV, XLSX atau ODS (dikenali dari isinya) menjadi
+    DataFrame berkolom `kolom` yang tersedia. `file` boleh berupa objek file
+    atau path.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as berkas:
+            return baca_tabel(berkas, kolom)
+    pembaca = {"csv": baca_csv, "xlsx": baca_xlsx, "ods": baca_ods}[jenis_berkas(file)]
+    return pembaca(file, kolom)
+
+
+def baca_tabel_potongan(file, kolom, ukuran):
+    """
+    Seperti baca_tabel, tetapi menghasilkan DataFrame per `ukuran` baris
+    sehingga file tidak pernah dimuat utuh.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as berkas:
+            yield from baca_tabel_potongan(berkas, kolom, ukuran)
+        return
+    jenis = jenis_berkas(file)
+    if jenis == "csv":
+        opsi, tersedia = _opsi_csv(file, kolom)
+        # Parser pyarrow tidak mendukung chunksize.
+        with pd.read_csv(file, engine="c", chunksize=ukuran, **opsi) as pembaca:
+            for df in pembaca:
+                yield df[tersedia]
+    else:
+        yield from _potongan_baris(_baris_xlsx(file) if jenis == "xlsx" else _baris_ods(file), kolom, ukuran)
+
+
+# ---------------------------------------------------------------------
+# MESIN PENCOCOKAN OFFSET (SUBSET-SUM)
+# ---------------------------------------------------------------------
+# Nominal diproses sebagai bilangan bulat (sen) agar perbandingan jumlah
+# persis, tanpa toleransi float.
+MAKS_ANGGOTA_GRUP = 8          # batas jumlah baris dalam satu grup N:1
+MAKS_KANDIDAT_MITM = 24        # kandidat sebanyak ini dicari tuntas (meet-in-the-middle)
+MAKS_KANDIDAT_PASANGAN = 4_096 # kandidat lebih banyak hanya dicari pasangan 2 baris; di atas ini dilewati
+MAKS_KEPADATAN = 0.02          # kombinasi tunggal ditolak bila jumlah acak di sekitar target sepadat ini
+BATAS_WAKTU_DETIK = 30.0       # batas waktu total pencarian kombinasi
+
+
+def _ke_sen(nilai):
+    """Ubah array nominal (rupiah, boleh desimal) menjadi int64 satuan sen."""
+    return np.rint(np.asarray(nilai, dtype=np.float64) * 100).astype(np.int64)
+
+
+def parse_nominal(kolom):
+    """
+    Ubah kolom nominal mentah ("1,234,567.50", "-", kosong) menjadi int64 sen.
+
+    Teks hanya dibersihkan sekali (hapus pemisah ribuan, "-" = 0) lalu
+    di-parse langsung oleh pd.to_numeric; kolom yang sudah numerik langsung
+    dikonversi tanpa lewat string.
+    """
+    if not pd.api.types.is_numeric_dtype(kolom):
+        teks = kolom.str.strip().str.replace(",", "", regex=False)
+        kolom = pd.to_numeric(teks.mask(teks == "-"))
+    return pd.Series(_ke_sen(kolom.fillna(0)), index=kolom.index, name=kolom.name)
+
+
+class _Fenwick:
+    """Pohon Fenwick atas array 0/1 (semua 1 di awal): jumlah prefix dan ubah per elemen."""
+
+    def __init__(self, n):
+        self.pohon = [i & -i for i in range(n + 1)]
+
+    def tambah(self, i, delta):
+        i += 1
+        while i < len(self.pohon):
+            self.pohon[i] += delta
+            i += i & -i
+
+    def jumlah(self, i):
+        """Jumlah elemen [0, i)."""
+        total = 0
+        while i > 0:
+            total += self.pohon[i]
+            i -= i & -i
+        return total
+
+
+def _semua_pilihan(nilai, kembar, target, maks_anggota):
+    """
+    Semua multiset atas nilai unik `nilai` (masing-masing paling banyak
+    `kembar` salinan) yang jumlahnya <= target dan anggotanya <=
+    maks_anggota. Mengembalikan (pilihan, jumlah, ukuran); pilihan berisi
+    banyak salinan per nilai.
+    """
+    pilihan = np.zeros((1, nilai.size), dtype=np.int64)
+    jumlah = np.zeros(1, dtype=np.int64)
+    for i, (v, c) in enumerate(zip(nilai.tolist(), kembar.tolist())):
+        salinan = np.arange(min(c, maks_anggota) + 1)
+        n = jumlah.size
+        pilihan = np.repeat(pilihan, salinan.size, axis=0)
+        pilihan[:, i] = np.tile(salinan, n)
+        jumlah = np.repeat(jumlah, salinan.size) + pilihan[:, i] * v
+        sah = (jumlah <= target) & (pilihan.sum(axis=1) <= maks_anggota)
+        pilihan, jumlah = pilihan[sah], jumlah[sah]
+    return pilihan, jumlah, pilihan.sum(axis=1)
+
+
+def _kepadatan(jumlah_kiri, jumlah_kanan, target, tepat, langkah):
+    """
+    Rata-rata banyak kombinasi (jumlah_kiri + jumlah_kanan, kanan urut naik)
+    per nilai yang mungkin di jendela 10% di bawah target, tanpa `tepat`
+    kombinasi yang jumlahnya persis target. Kombinasi tunggal di daerah yang
+    padat kemungkinan besar kebetulan.
+    """
+    lebar = target // 10
+    lo = np.searchsorted(jumlah_kanan, target - lebar - jumlah_kiri, side="left")
+    hi = np.searchsorted(jumlah_kanan, target - jumlah_kiri, side="right")
+    return (int((hi - lo).sum()) - tepat) / (lebar // langkah + 1)
+
+
+def _kombinasi_mitm(nilai, target, maks_anggota):
+    """
+    Pencarian tuntas meet-in-the-middle atas kandidat `nilai` (urut naik,
+    sedikit): kombinasi 2..maks_anggota nilai yang jumlahnya persis target.
+    Nilai kembar dihitung sebagai satu multiset. Mengembalikan (indeks,
+    ambigu): indeks bila kombinasinya tunggal, ambigu bila lebih dari satu.
+    """
+    unik, pertama, kembar = np.unique(nilai, return_index=True, return_counts=True)
+    # Belah nilai unik agar banyak pilihan kedua paruh kira-kira seimbang.
+    beban = np.cumsum(np.log(np.minimum(kembar, maks_anggota) + 1))
+    h = int(np.searchsorted(beban, beban[-1] / 2)) + 1
+    kiri, jumlah_kiri, ukuran_kiri = _semua_pilihan(unik[:h], kembar[:h], target, maks_anggota)
+    kanan, jumlah_kanan, ukuran_kanan = _semua_pilihan(unik[h:], kembar[h:], target, maks_anggota)
+
+    # Pasangkan lewat kunci (jumlah, ukuran) paruh kanan yang terurut.
+    lebar = maks_anggota + 1
+    kunci_kanan = jumlah_kanan * lebar + ukuran_kanan
+    urut = np.argsort(kunci_kanan, kind="stable")
+    kunci_kanan = kunci_kanan[urut]
+    sisa = (target - jumlah_kiri) * lebar
+    lo = np.searchsorted(kunci_kanan, sisa, side="left")
+    hi = np.searchsorted(kunci_kanan, sisa + maks_anggota - ukuran_kiri, side="right")
+    # Semua nilai < target, jadi setiap kombinasi yang cocok beranggota >= 2.
+    cocok = hi - lo
+    total = int(cocok.sum())
+    if total != 1:
+        return None, total > 1
+    langkah = int(np.gcd.reduce(np.append(unik, target)))
+    if _kepadatan(jumlah_kiri, kunci_kanan // lebar, target, total, langkah) > MAKS_KEPADATAN:
+        return None, True
+    i = int(np.flatnonzero(cocok)[0])
+    salinan = np.concatenate([kiri[i], kanan[urut[lo[i]]]])
+    return np.concatenate([pertama[u] + np.arange(k) for u, k in enumerate(salinan.tolist()) if k]), False
+
+
+def _pasangan_unik(nilai, target):
+    """Dua nilai (urut naik) yang jumlahnya target: (indeks, ambigu) seperti _kombinasi_mitm."""
+    unik, pertama, kembar = np.unique(nilai, return_index=True, return_counts=True)
+    komplemen = target - unik
+    j = np.clip(np.searchsorted(unik, komplemen), 0, unik.size - 1)
+    cocok = unik[j] == komplemen
+    beda = cocok & (unik < komplemen)
+    sama = cocok & (unik == komplemen) & (kembar >= 2)
+    total = int(beda.sum() + sama.sum())
+    if total != 1:
+        return None, total > 1
+    # Pasangan terurut (a, b) dan (b, a) dihitung dua kali.
+    langkah = int(np.gcd.reduce(np.append(unik, target)))
+    if _kepadatan(nilai, nilai, target, 2, langkah) / 2 > MAKS_KEPADATAN:
+        return None, True
+    if beda.any():
+        i = int(np.flatnonzero(beda)[0])
+        return np.array([pertama[i], pertama[j[i]]]), False
+    i = int(np.flatnonzero(sama)[0])
+    return np.array([pertama[i], pertama[i] + 1]), False
+
+
+class _PoolNilai:
+    """
+    Kumpulan nilai yang belum terpakai, urut naik. Nilai yang terpakai hanya
+    ditandai (tombstone); pohon Fenwick menghitung sisa aktif di bawah target.
+    """
+
+    def __init__(self, nilai, posisi):
+        urut = np.argsort(nilai, kind="stable")
+        self.nilai, self.posisi = nilai[urut], posisi[urut]
+        self.aktif = np.ones(nilai.size, dtype=bool)
+        self._hitung = _Fenwick(nilai.size)
+        self._n_aktif = nilai.size
+
+    def cari(self, target, maks_anggota):
+        """
+        (indeks pool yang jumlahnya persis target secara tunggal atau None,
+        ambigu). Ambigu bila ada lebih dari satu kombinasi, atau kandidatnya
+        terlalu banyak untuk dicari tuntas dan tidak ada pasangan tunggal.
+        """
+        hi = int(np.searchsorted(self.nilai, target))
+        n = self._hitung.jumlah(hi)
+        if n < 2:
+            return None, False
+        if n > MAKS_KANDIDAT_PASANGAN:
+            return None, True
+        calon = np.flatnonzero(self.aktif[:hi])
+        if n <= MAKS_KANDIDAT_MITM:
+            pilih, ambigu = _kombinasi_mitm(self.nilai[calon], target, maks_anggota)
+        else:
+            pilih, _ = _pasangan_unik(self.nilai[calon], target)
+            # Grup > 2 baris tidak dicari: target tanpa pasangan tunggal dilaporkan, bukan diam-diam GANTUNG.
+            ambigu = pilih is None
+        return (None if pilih is None else calon[pilih]), ambigu
+
+    def ambil(self, indeks):
+        """Tandai indeks pool terpakai, kembalikan posisi aslinya."""
+        for i in indeks.tolist():
+            self.aktif[i] = False
+            self._hitung.tambah(i, -1)
+        self._n_aktif -= len(indeks)
+        return sorted(self.posisi[indeks].tolist())
+
+    def sisa(self):
+        """Posisi asli nilai yang belum terpakai."""
+        return self.posisi[self.aktif]
+
+    def __len__(self):
+        return self._n_aktif
+
+
+def cocokkan_subset(debit, kredit, batas_waktu=BATAS_WAKTU_DETIK, maks_anggota=MAKS_ANGGOTA_GRUP):
+    """
+    Cari grup N:1 antara debit dan kredit (array int64 dalam sen).
+
+    Tahap (a): setiap debit (terbesar dulu) dicari kombinasi 2..maks_anggota
+    kredit yang jumlahnya persis sama. Tahap (b): sebaliknya, untuk kredit
+    yang tersisa. Kandidat sampai MAKS_KANDIDAT_MITM dicari tuntas, sampai
+    MAKS_KANDIDAT_PASANGAN hanya pasangan dua baris; kombinasi hanya
+    diterima bila satu-satunya. Mengembalikan (grup, waktu_habis, ambigu):
+    grup berisi tuple (posisi_debit, posisi_kredit) berupa list posisi dalam
+    array masukan; ambigu berisi (posisi_debit, posisi_kredit) target yang
+    dilewati (kombinasinya tidak tunggal atau kandidatnya terlalu banyak)
+    dan tetap tidak ter-offset.
+    """
+    debit = np.asarray(debit, dtype=np.int64)
+    kredit = np.asarray(kredit, dtype=np.int64)
+    batas = time.perf_counter() + batas_waktu
+    grup = []
+    waktu_habis = False
+    pakai_debit = np.zeros(debit.size, dtype=bool)
+    ambigu_debit = np.zeros(debit.size, dtype=bool)
+    ambigu_kredit = np.zeros(kredit.size, dtype=bool)
+
+    def tahap(target, urutan, pool, ambigu, simpan):
+        nonlocal waktu_habis
+        for i in urutan.tolist():
+            if len(pool) == 0:
+                break
+            if time.perf_counter() > batas:
+                waktu_habis = True
+                break
+            hasil, ragu = pool.cari(int(target[i]), maks_anggota)
+            if hasil is not None:
+                simpan(i, pool.ambil(hasil))
+            elif ragu:
+                ambigu[i] = True
+
+    def simpan_a(i, anggota):
+        pakai_debit[i] = True
+        grup.append(([i], anggota))
+
+    def simpan_b(j, anggota):
+        pakai_debit[anggota] = True
+        grup.append((anggota, [j]))
+
+    pool = _PoolNilai(kredit, np.arange(kredit.size))
+    tahap(debit, np.argsort(-debit, kind="stable"), pool, ambigu_debit, simpan_a)
+    if not waktu_habis:
+        sisa_kredit = np.sort(pool.sisa())
+        sisa_debit = np.flatnonzero(~pakai_debit)
+        pool = _PoolNilai(debit[sisa_debit], sisa_debit)
+        urutan = sisa_kredit[np.argsort(-kredit[sisa_kredit], kind="stable")]
+        tahap(kredit, urutan, pool, ambigu_kredit, simpan_b)
+
+    # Target yang dilewati tetapi kemudian terpakai sebagai anggota grup lain tidak dilaporkan.
+    return grup, waktu_habis, (np.flatnonzero(ambigu_debit & ~pakai_debit), np.flatnonzero(ambigu_kredit))
+
+
+def pasangan_persis(debit, kredit, kunci_debit=0, kunci_kredit=0):
+    """
+    Pasangkan debit dan kredit bernilai sama (kemunculan ke-k dengan ke-k),
+    hanya di antara baris dengan kunci partisi yang sama bila diberikan.
+    """
+    d = pd.DataFrame({"kunci": kunci_debit, "nilai": debit, "pos_debit": np.arange(debit.size)})
+    k = pd.DataFrame({"kunci": kunci_kredit, "nilai": kredit, "pos_kredit": np.arange(kredit.size)})
+    d["ke"] = d.groupby(["kunci", "nilai"]).cumcount()
+    k["ke"] = k.groupby(["kunci", "nilai"]).cumcount()
+    pasangan = d.merge(k, on=["kunci", "nilai", "ke"])
+    return pasangan["pos_debit"].to_numpy(), pasangan["pos_kredit"].to_numpy()
+
+
+def _susun_offset(persis_debit, persis_kredit, baris_debit, baris_kredit, grup):
+    """
+    Rakit (posisi, id_grup) urut posisi: pasangan persis (posisi baris debit
+    dan kredit sejajar, bernomor 0..n-1) lalu grup N:1 hasil cocokkan_subset
+    atas pool baris_debit/baris_kredit. Posisi boleh berupa kode baris apa pun
+    (int64), asalkan unik per baris.
+    """
+    n_persis = persis_debit.size
+    posisi = [persis_debit, persis_kredit]
+    id_grup = [np.arange(n_persis), np.arange(n_persis)]
+    for nomor, (g_debit, g_kredit) in enumerate(grup, start=n_persis):
+        posisi.append(baris_debit[g_debit])
+        posisi.append(baris_kredit[g_kredit])
+        id_grup.append(np.full(len(g_debit) + len(g_kredit), nomor))
+
+    posisi = np.concatenate(posisi).astype(np.int64)
+    id_grup = np.concatenate(id_grup).astype(np.int64)
+    # Baris yang berisi Debet dan Kredit sekaligus bisa muncul dua kali; ambil grup pertama.
+    posisi, pertama = np.unique(posisi, return_index=True)
+    return posisi, id_grup[pertama]
+
+
+def cari_offset(debet_sen, kredit_sen, batas_waktu=BATAS_WAKTU_DETIK, kunci=None, proses=None):
+    """
+    Cari baris yang saling meng-offset dari kolom Debet/Kredit (int64 sen).
+
+    Mengembalikan (posisi, id_grup, waktu_habis, ambigu): posisi baris
+    (0..n-1) yang ter-offset beserta nomor grupnya, dan posisi baris yang
+    tetap GANTUNG karena kombinasi N:1-nya tidak tunggal (lihat
+    cocokkan_subset). Baris dengan nomor grup yang sama saling meniadakan
+    (1:1 nilai persis, atau N:1 hasil subset-sum).
+
+    Dengan `kunci` (lihat kunci_partisi) offset hanya dicari di antara baris
+    separtisi dan baris berkunci -1 dilewati; lihat _subset_partisi untuk
+    `proses`.
+    """
+    tenggat = time.time() + batas_waktu
+    ikut = True if kunci is None else kunci >= 0
+    baris_debit = np.flatnonzero((debet_sen > 0) & ikut)
+    baris_kredit = np.flatnonzero((kredit_sen > 0) & ikut)
+    debit = debet_sen[baris_debit]
+    kredit = kredit_sen[baris_kredit]
+    kunci_debit = 0 if kunci is None else kunci[baris_debit]
+    kunci_kredit = 0 if kunci is None else kunci[baris_kredit]
+
+    # --- Langkah 1: Pasangan nilai persis ---
+    pos_debit, pos_kredit = pasangan_persis(debit, kredit, kunci_debit, kunci_kredit)
+
+    # --- Langkah 2: Kombinasi subset-sum (1 debit = banyak kredit, lalu sebaliknya) ---
+    sisa_debit = np.setdiff1d(np.arange(debit.size), pos_debit)
+    sisa_kredit = np.setdiff1d(np.arange(kredit.size), pos_kredit)
+    if kunci is None:
+        grup, waktu_habis, (ambigu_debit, ambigu_kredit) = cocokkan_subset(
+            debit[sisa_debit], kredit[sisa_kredit], batas_waktu=batas_waktu
+        )
+    else:
+        grup, waktu_habis, (ambigu_debit, ambigu_kredit) = _subset_partisi(
+            debit[sisa_debit], kredit[sisa_kredit], kunci_debit[sisa_debit], kunci_kredit[sisa_kredit],
+            tenggat, proses,
+        )
+
+    persis = (baris_debit[pos_debit], baris_kredit[pos_kredit])
+    baris_debit, baris_kredit = baris_debit[sisa_debit], baris_kredit[sisa_kredit]
+    posisi, id_grup = _susun_offset(*persis, baris_debit, baris_kredit, grup)
+    ambigu = np.union1d(baris_debit[ambigu_debit], baris_kredit[ambigu_kredit])
+    return posisi, id_grup, waktu_habis, np.setdiff1d(ambigu, posisi)
+
+
+# ---------------------------------------------------------------------
+# OFFSET PER PARTISI
+# ---------------------------------------------------------------------
+# Pool sisa bisa dipecah per kunci (mis. Dibayarkan (ke/dari), Vessel Voyage,
+# jendela tanggal): setiap partisi dicari offset-nya sendiri-sendiri, lalu
+# satu putaran global atas baris yang tersisa.
+KOLOM_PARTISI = ["Dibayarkan (ke/dari)", "Vessel Voyage", "Tanggal Kasir"]
+JENDELA_TANGGAL_HARI = 7      # lebar jendela bila kunci partisi berupa tanggal
+MIN_BARIS_PARALEL = 20_000    # pool lebih kecil diproses berurutan (overhead proses lebih mahal)
+
+
+def _parse_tanggal(kolom):
+    """
+    Parse kolom tanggal: ISO (YYYY-MM-DD) dulu. Format garis miring/titik
+    (DD/MM/YYYY atau MM/DD/YYYY) hanya dipakai bila urutannya pasti dari
+    isi kolom (ada bagian > 12 di satu posisi saja); bila ambigu, yang tidak
+    terbaca sebagai ISO menjadi NaT, bukan ditebak.
+    """
+    if pd.api.types.is_datetime64_any_dtype(kolom):
+        return kolom
+    iso = pd.to_datetime(kolom, format="ISO8601", errors="coerce")
+    if iso.notna().sum() == kolom.notna().sum():
+        return iso
+    bagian = kolom.astype("str").str.extract(r"^\s*(\d{1,2})[/.-](\d{1,2})[/.-]\d{2,4}\b")
+    lebih_12 = [(pd.to_numeric(bagian[i]) > 12).any() for i in (0, 1)]
+    if lebih_12[0] == lebih_12[1]:
+        return iso
+    lain = pd.to_datetime(kolom, format="mixed", dayfirst=lebih_12[0], errors="coerce")
+    return lain if lain.notna().sum() > iso.notna().sum() else iso
+
+
+def _teks_tanggal(tanggal):
+    """teks_sel untuk Series datetime64: YYYY-MM-DD, atau dengan jam bila ada."""
+    teks = tanggal.dt.strftime("%Y-%m-%d %H:%M:%S")
+    return teks.mask(tanggal == tanggal.dt.normalize(), tanggal.dt.strftime("%Y-%m-%d"))
+
+
+def kunci_partisi(df, kolom, jendela_hari=JENDELA_TANGGAL_HARI):
+    """
+    Nomor partisi (int64) per baris `df` menurut `kolom`; -1 bila salah satu
+    nilai kunci kosong (baris itu hanya ikut putaran global). Teks disamakan
+    (trim, huruf besar) dan tanggal dikelompokkan per `jendela_hari` hari.
+    """
+    bagian = {}
+    for col in kolom:
+        if col in KOLOM_TANGGAL:
+            bagian[col] = (_parse_tanggal(df[col]) - pd.Timestamp(0)).dt.days // jendela_hari
+        else:
+            bagian[col] = df[col].str.strip().str.upper().replace("", None)
+    kunci = pd.DataFrame(bagian).groupby(list(kolom), dropna=True, sort=False).ngroup()
+    return kunci.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _subset_per_partisi(tugas, tenggat):
+    """cocokkan_subset untuk beberapa partisi (debit, kredit); `tenggat` berupa time.time()."""
+    return [cocokkan_subset(debit, kredit, batas_waktu=max(0.0, tenggat - time.time())) for debit, kredit in tugas]
+
+
+def _kelompok(nilai_kunci):
+    """{kunci: posisi} untuk setiap kunci >= 0 pada array nilai_kunci."""
+    urut = np.argsort(nilai_kunci, kind="stable")
+    potongan = np.split(urut, np.flatnonzero(np.diff(nilai_kunci[urut])) + 1)
+    return {int(nilai_kunci[p[0]]): p for p in potongan if p.size and nilai_kunci[p[0]] >= 0}
+
+
+def _subset_partisi(debit, kredit, kunci_debit, kunci_kredit, tenggat, proses=None):
+    """
+    cocokkan_subset di dalam setiap partisi kunci (>= 0), dengan hasil
+    berbentuk sama seperti satu panggilan cocokkan_subset atas seluruh pool.
+    Partisi dikerjakan paralel di `proses` pekerja (bawaan os.cpu_count())
+    bila pool cukup besar; `proses=1` selalu berurutan.
+    """
+    per_debit = _kelompok(kunci_debit)
+    per_kredit = _kelompok(kunci_kredit)
+    partisi = [(per_debit[k], per_kredit[k]) for k in per_debit if k in per_kredit]
+    tugas = [(debit[d], kredit[k]) for d, k in partisi]
+
+    pekerja = proses or os.cpu_count() or 1
+    if pekerja > 1 and len(tugas) > 1 and debit.size + kredit.size >= MIN_BARIS_PARALEL:
+        # Partisi terbesar dibagi dulu agar beban tiap keranjang seimbang.
+        keranjang = [[] for _ in range(min(len(tugas), pekerja * 4))]
+        for i, p in enumerate(sorted(range(len(tugas)), key=lambda p: -tugas[p][0].size - tugas[p][1].size)):
+            keranjang[i % len(keranjang)].append(p)
+        hasil_partisi = [None] * len(tugas)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=pekerja) as pool:
+            per_keranjang = pool.map(
+                _subset_per_partisi, [[tugas[p] for p in isi] for isi in keranjang], [tenggat] * len(keranjang)
+            )
+            for isi, hasil_keranjang in zip(keranjang, per_keranjang):
+                for p, hasil in zip(isi, hasil_keranjang):
+                    hasil_partisi[p] = hasil
+    else:
+        hasil_partisi = _subset_per_partisi(tugas, tenggat)
+
+    grup, waktu_habis, ambigu_debit, ambigu_kredit = [], False, [debit[:0]], [kredit[:0]]
+    for (d, k), (grup_partisi, habis, (a_debit, a_kredit)) in zip(partisi, hasil_partisi):
+        waktu_habis |= habis
+        ambigu_debit.append(d[a_debit])
+        ambigu_kredit.append(k[a_kredit])
+        grup += [(d[g_debit].tolist(), k[g_kredit].tolist()) for g_debit, g_kredit in grup_partisi]
+    return grup, waktu_habis, (np.concatenate(ambigu_debit), np.concatenate(ambigu_kredit))
+
+
+def cari_offset_partisi(debet_sen, kredit_sen, kunci, batas_waktu=BATAS_WAKTU_DETIK, proses=None):
+    """
+    Seperti cari_offset, tetapi offset dicari dulu di dalam setiap partisi
+    `kunci` (cari_offset dengan kunci), lalu satu putaran global atas semua
+    baris yang tersisa, termasuk baris tanpa kunci. Nomor grup unik di
+    seluruh hasil.
+    """
+    tenggat = time.time() + batas_waktu
+    posisi, id_grup, waktu_habis, ambigu = cari_offset(
+        debet_sen, kredit_sen, batas_waktu=batas_waktu, kunci=kunci, proses=proses
+    )
+    sisa = np.setdiff1d(np.arange(debet_sen.size), posisi)
+    pos, grup, habis, ambigu_global = cari_offset(
+        debet_sen[sisa], kredit_sen[sisa], batas_waktu=max(0.0, tenggat - time.time())
+    )
+    nomor = int(id_grup.max()) + 1 if id_grup.size else 0
+    posisi = np.concatenate([posisi, sisa[pos]])
+    id_grup = np.concatenate([id_grup, grup + nomor])
+    urut = np.argsort(posisi, kind="stable")
+    ambigu = np.setdiff1d(np.union1d(ambigu, sisa[ambigu_global]), posisi)
+    return posisi[urut], id_grup[urut], waktu_habis or habis, ambigu
+
+
+# ---------------------------------------------------------------------
+# TAHAP-TAHAP PIPELINE
+# ---------------------------------------------------------------------
+def terapkan_skema(df):
+    """
+    Ubah kolom teks df ke skema ringkas: KOLOM_KATEGORI menjadi category dan
+    KOLOM_TANGGAL menjadi datetime64. Kolom tanggal dibiarkan teks bila ada
+    nilai yang tidak terbaca sebagai tanggal atau yang teks ekspornya (lihat
+    teks_sel) berbeda dari aslinya, mis. DD/MM/YYYY atau jam tanpa detik,
+    agar isinya tidak berubah.
+    """
+    ubah = {}
+    for col in df.columns.intersection(KOLOM_KATEGORI):
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            ubah[col] = df[col].astype("category")
+    for col in df.columns.intersection(KOLOM_TANGGAL):
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            # Cukup parse nilai unik (tanggal umumnya berulang); kode -1 (kosong) menjadi NaT.
+            kode, unik = pd.factorize(df[col])
+            unik = pd.Series(unik, dtype=object)
+            tanggal = _parse_tanggal(unik)
+            if tanggal.notna().all() and (_teks_tanggal(tanggal) == unik).all():
+                ubah[col] = pd.Series(np.append(tanggal.to_numpy(), np.datetime64("NaT"))[kode], index=df.index)
+    return df.assign(**ubah) if ubah else df
+
+
+def ukuran_frame(df):
+    """Byte yang dipakai kolom-kolom df (termasuk isi teks)."""
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+def siapkan_data(df):
+    """
+    Terapkan skema ringkas dan ubah Debet/Kredit menjadi int64 sen. Nomor
+    baris asal (kolom "index" laporan) tidak disimpan; nilainya sama dengan
+    posisi baris dan baru dibentuk saat ekspor.
+    """
+    df = terapkan_skema(df)
+    df["Debet"] = parse_nominal(df["Debet"])
+    df["Kredit"] = parse_nominal(df["Kredit"])
+    return df
+
+
+# ---------------------------------------------------------------------
+# KLASIFIKASI KEPERLUAN
+# ---------------------------------------------------------------------
+# Aturan diperiksa berurutan; aturan pertama yang cocok menentukan kategori.
+# Pola dengan grup tangkapan sekaligus mengisi ID_1 (nomor BKK/BKM).
+POLA_PN = re.compile("PEMBAYARAN ATAS NOTA", re.IGNORECASE)
+POLA_BKK = re.compile(r'(?:ID)?BKK\s*[:\-]?\s*(\d+/\d{4})')
+POLA_BKM = re.compile(r'(?:ID)?BKM\s*[:\-]?\s*(\d+/\d{4})')
+
+ATURAN_CABANG_SBY = [
+    ("PN", POLA_PN),
+    ("bkk", POLA_BKK),
+    ("bkm", POLA_BKM),
+    ("va_ri", re.compile("PENERIMAAN GIRO DENGAN VA|KODE LAWAN RI", re.IGNORECASE)),
+]
+
+ATURAN_SBY_CABANG = [
+    ("PN", POLA_PN),
+    ("jmu", re.compile("JMU ASD|JMU ASK", re.IGNORECASE)),
+    ("bkk", POLA_BKK),
+    ("bkm", POLA_BKM),
+    ("va_ri", re.compile("PEMBAYARAN DPP GIRO|KODE LAWAN RO|PEMBAYARAN DPP TUNAI", re.IGNORECASE)),
+]
+
+KATEGORI_SISA = "sisa"
+
+
+def klasifikasi_keperluan(df, aturan):
+    """
+    Kelompokkan baris berdasarkan teks Keperluan dalam satu kali lintasan.
+
+    Setiap teks Keperluan unik diperiksa sekali terhadap `aturan`, lalu
+    hasilnya dipetakan ke semua baris. Posisi berupa dict kategori ->
+    array posisi baris; baris yang tidak cocok dengan aturan mana pun masuk
+    ke kategori "sisa". Hasilnya (df, posisi) dengan df ditambah kolom
+    "ID_1"; kategori hanya disimpan sebagai posisi.
+    """
+    kode, unik = pd.factorize(df["Keperluan"])
+    # Satu slot tambahan di akhir untuk Keperluan kosong (kode -1).
+    kategori = np.full(len(unik) + 1, KATEGORI_SISA, dtype=object)
+    id_1 = np.full(len(unik) + 1, np.nan, dtype=object)
+    for i, teks in enumerate(unik):
+        for nama, pola in aturan:
+            cocok = pola.search(teks)
+            if cocok:
+                kategori[i] = nama
+                if pola.groups:
+                    id_1[i] = cocok.group(1)
+                break
+
+    df = df.assign(ID_1=pd.array(id_1[kode], dtype="str"))
+    kategori_baris = kategori[kode]
+    posisi = {
+        nama: np.flatnonzero(kategori_baris == nama)
+        for nama in [nama for nama, _ in aturan] + [KATEGORI_SISA]
+    }
+    return df, posisi
+
+
+def _jumlah(df, posisi):
+    """(Debet, Kredit) dalam sen untuk baris `posisi` pada df."""
+    return int(df["Debet"].to_numpy()[posisi].sum()), int(df["Kredit"].to_numpy()[posisi].sum())
+
+
+def baris_total(*jumlah, selisih=True):
+    """Baris total dari pasangan (Debet, Kredit) dalam sen; selisih ditaruh di Tempat Pembayaran."""
+    debet = sum(d for d, _ in jumlah)
+    kredit = sum(k for _, k in jumlah)
+    total = {"Debet": debet, "Kredit": kredit}
+    if selisih:
+        total["Tempat Pembayaran"] = debet - kredit
+    return total
+
+
+def cocokkan_id(df, sisa, id_bkk, id_bkm):
+    """
+    Ambil baris `sisa` (posisi pada df) yang ID Dokumen-nya dirujuk BKK/BKM sisi lawan.
+
+    Indeks ID_1 -> jenis (BKK didahulukan bila ID muncul di keduanya) dibuat
+    sekali, lalu dicocokkan ke ID Dokumen dalam satu hash-join. Mengembalikan
+    posisi (cocok_bkk, cocok_bkm, sisa_baru).
+    """
+    acuan = pd.concat([
+        pd.Series("bkk", index=pd.unique(id_bkk)),
+        pd.Series("bkm", index=pd.unique(id_bkm)),
+    ])
+    acuan = acuan[~acuan.index.duplicated()]
+    jenis = df["ID Dokumen"].take(sisa).map(acuan).to_numpy()
+    return sisa[jenis == "bkk"], sisa[jenis == "bkm"], sisa[pd.isna(jenis)]
+
+
+# ---------------------------------------------------------------------
+# MODEL LAPORAN
+# ---------------------------------------------------------------------
+UKURAN_POTONGAN = 10_000   # baris data yang diambil sekaligus saat ekspor
+
+# Urutan grup per lembar Excel (urutan kunci = urutan lembar).
+URUTAN_GRUP = {
+    "cabang_sby": ["D1", "A1", "A2", "A3", "A4", "A5", "A6", "C1"],
+    "sby_cabang": ["D2", "A1", "A2", "B1", "A3", "A4", "A5", "A6", "C1"],
+}
+
+
+def _nilai_kolom(kolom, posisi):
+    """
+    List nilai Python `kolom` pada `posisi`. Category diambil lewat kodenya
+    dan tanggal menjadi datetime (NaT -> None), tanpa mengubah seluruh kolom.
+    """
+    if isinstance(kolom.dtype, pd.CategoricalDtype):
+        # Kode -1 (kosong) menunjuk slot NaN terakhir.
+        kategori = np.append(kolom.cat.categories.to_numpy(dtype=object), np.nan)
+        return kategori[kolom.cat.codes.to_numpy()[posisi]].tolist()
+    if pd.api.types.is_datetime64_any_dtype(kolom):
+        return kolom.to_numpy()[posisi].astype("datetime64[us]").tolist()
+    return kolom.to_numpy()[posisi].tolist()
+
+
+def kolom_laporan(dasar, kode, posisi, kolom=None):
+    """
+    Kolom-kolom (list nilai, urutan columns_final) baris `posisi` frame
+    `dasar` sebagai baris data grup `kode`. `kolom` berisi kolom tambahan:
+    array sepanjang `posisi` atau satu nilai untuk semua baris. Tanpa kolom
+    "index", nomor baris asal = posisi.
+    """
+    kolom = kolom or {}
+    hasil = []
+    for col in columns_final:
+        if col == "Grup":
+            nilai = [kode] * posisi.size
+        elif col in kolom:
+            nilai = kolom[col]
+            nilai = nilai.tolist() if hasattr(nilai, "tolist") else [nilai] * posisi.size
+        elif col in ("Debet", "Kredit"):
+            nilai = (dasar[col].to_numpy()[posisi] / 100).tolist()
+        elif col == "index" and col not in dasar.columns:
+            nilai = posisi.tolist()
+        elif col in dasar.columns:
+            nilai = _nilai_kolom(dasar[col], posisi)
+        else:
+            nilai = [None] * posisi.size
+        hasil.append(nilai)
+    return hasil
+
+
+class LaporanRK:
+    """
+    Laporan rekonsiliasi: setiap grup (A1 ... D2) disimpan sekali sebagai
+    posisi baris pada frame dasar sisinya plus baris totalnya (sen).
+    Baris laporan baru dibentuk saat diekspor, per potongan baris.
+    """
+
+    def __init__(self, dasar):
+        self.dasar = dasar
+        self.grup = {}
+        self.waktu_habis = False
+        self.ambigu = 0     # baris GANTUNG yang kombinasi N:1-nya tidak tunggal / tidak dicari
+        self.gantungan_terpakai = np.array([], dtype=np.int64)
+
+    def tambah(self, sisi, kode, posisi, total, kolom=None, baris_awal=None):
+        """Daftarkan grup `kode` di lembar `sisi`; `kolom` berisi kolom tambahan per baris."""
+        posisi = np.asarray(posisi, dtype=np.int64)
+        self.grup[sisi, kode] = {
+            "posisi": posisi,
+            "jumlah": posisi.size,
+            "total": total,
+            "kolom": kolom or {},
+            "baris_awal": baris_awal or [],
+        }
+
+    def _sel(self, sisi, kode, potong=slice(None)):
+        """Kolom-kolom (list nilai, urutan columns_final) untuk sebagian baris data grup."""
+        g = self.grup[sisi, kode]
+        kolom = {col: nilai[potong] if hasattr(nilai, "tolist") else nilai for col, nilai in g["kolom"].items()}
+        return kolom_laporan(self.dasar[sisi], kode, g["posisi"][potong], kolom)
+
+    def _baris_data(self, sisi, kode):
+        """Baris data satu grup, diambil per potongan UKURAN_POTONGAN."""
+        for mulai in range(0, self.grup[sisi, kode]["posisi"].size, UKURAN_POTONGAN):
+            yield from zip(*self._sel(sisi, kode, slice(mulai, mulai + UKURAN_POTONGAN)))
+
+    def _baris_nominal(self, kode, nominal):
+        """Baris berisi nominal saja (baris total / selisih sebelumnya), dalam rupiah."""
+        return [kode if col == "Grup" else (nominal[col] / 100 if col in nominal else None) for col in columns_final]
+
+    def baris(self, sisi):
+        """
+        Hasilkan baris-baris satu lembar secara berurutan (list nilai sesuai
+        columns_final): per grup baris data, baris total, lalu 2 baris kosong.
+        Baris data diambil per potongan UKURAN_POTONGAN agar memori tetap kecil.
+        """
+        for kode in URUTAN_GRUP[sisi]:
+            g = self.grup[sisi, kode]
+            for nominal in g["baris_awal"]:
+                yield self._baris_nominal(kode, nominal)
+            yield from self._baris_data(sisi, kode)
+            yield self._baris_nominal(kode, g["total"])
+            yield []
+            yield []
+
+    def data(self, sisi):
+        """Baris data satu lembar (tanpa baris total/kosong) sebagai DataFrame, nominal dalam rupiah."""
+        bagian = []
+        for kode in URUTAN_GRUP[sisi]:
+            g = self.grup[sisi, kode]
+            nominal = pd.DataFrame([dict(baris, Grup=kode) for baris in g["baris_awal"]], columns=columns_final)
+            sel = pd.DataFrame(dict(zip(columns_final, self._sel(sisi, kode))), columns=columns_final)
+            bagian += [nominal.assign(Debet=nominal["Debet"] / 100), sel]
+        df = pd.concat([b for b in bagian if len(b)], ignore_index=True).reindex(columns=columns_final)
+        df["ID_Offset"] = df["ID_Offset"].astype("Int64")
+        return df
+
+    def ringkasan(self):
+        """Jumlah baris dan total (rupiah) setiap grup per lembar, sebagai DataFrame."""
+        return pd.DataFrame([
+            {"Lembar": sisi, "Grup": kode, "Baris": g["jumlah"],
+             "Debet": g["total"]["Debet"] / 100, "Kredit": g["total"]["Kredit"] / 100}
+            for sisi in URUTAN_GRUP for kode in URUTAN_GRUP[sisi]
+            for g in [self.grup[sisi, kode]]
+        ])
+
+    def baris_gantung(self):
+        """Baris GANTUNG periode ini (D1 dan D2) dengan kolom "sisi"; Debet/Kredit dalam sen."""
+        bagian = []
+        for sisi, kode in (("cabang_sby", "D1"), ("sby_cabang", "D2")):
+            posisi = self.grup[sisi, kode]["posisi"]
+            baris = self.dasar[sisi].take(posisi).assign(sisi=sisi)
+            if "index" not in baris.columns:
+                baris.insert(0, "index", posisi)
+            bagian.append(baris)
+        return pd.concat(bagian, ignore_index=True)
+
+
+def _tambah_bawaan(dasar, sisa, bawaan):
+    """
+    Tempelkan baris gantungan bawaan ke ujung frame dasar dan ke daftar sisa.
+    Baris bawaan membawa nomor baris asalnya, jadi kolom "index" dibentuk
+    untuk baris periode ini, dan kategori yang berbeda disatukan kembali.
+    """
+    if not len(bawaan):
+        return dasar, sisa
+    n_asli = len(dasar)
+    if "index" not in dasar.columns:
+        dasar = dasar.assign(index=np.arange(n_asli))
+    dasar = terapkan_skema(pd.concat([dasar, bawaan.drop(columns="sisi")], ignore_index=True))
+    return dasar, np.concatenate([sisa, np.arange(n_asli, len(dasar))])
+
+
+def susun_laporan(cabang, sby, selisih_sebelumnya=0, batas_waktu=BATAS_WAKTU_DETIK, pencatat=None,
+                  gantungan=None, periode=None, partisi=None, jendela_hari=JENDELA_TANGGAL_HARI, proses=None):
+    """
+    Bentuk seluruh grup laporan (A1 ... D2) dari hasil klasifikasi kedua sisi.
+
+    `cabang` dan `sby` adalah hasil klasifikasi_keperluan (df, posisi).
+    `selisih_sebelumnya` dalam rupiah. Tahap "cocok_id", "gantungan" dan
+    "offset" dicatat ke `pencatat` bila diberikan. Mengembalikan LaporanRK.
+
+    Bila `gantungan` (rk_gantungan.GudangGantungan) diberikan, baris gantung
+    periode sebelum `periode` yang nominalnya menutup sisa baru ikut dicari
+    offset-nya. Yang cocok masuk C1 dengan Sumber "gantungan" (id-nya di
+    `laporan.gantungan_terpakai`); yang tidak cocok tetap di simpanan dan
+    tidak ditampilkan lagi di D1/D2.
+
+    Dengan `partisi` (daftar kolom, lihat KOLOM_PARTISI) offset dicari per
+    partisi lewat cari_offset_partisi dengan `proses` pekerja.
+    """
+    dasar_cabang, pos_cabang = cabang
+    dasar_sby, pos_sby = sby
+    laporan = LaporanRK({"cabang_sby": dasar_cabang, "sby_cabang": dasar_sby})
+
+    def jumlah_cabang(posisi):
+        return _jumlah(dasar_cabang, posisi)
+
+    def jumlah_sby(posisi):
+        return _jumlah(dasar_sby, posisi)
+
+    # --- PROSES TOTAL (VA/RI) ---
+    baris_sebelumnya = {"Debet": int(round(selisih_sebelumnya * 100))}
+    total_va_ri = baris_total(
+        (baris_sebelumnya["Debet"], 0), jumlah_cabang(pos_cabang["va_ri"]), jumlah_sby(pos_sby["va_ri"])
+    )
+    laporan.tambah("sby_cabang", "A1", pos_sby["va_ri"], total_va_ri)
+    laporan.tambah("cabang_sby", "A1", pos_cabang["va_ri"], total_va_ri, baris_awal=[baris_sebelumnya])
+
+    # --- PROSES TOTAL (PN) ---
+    total_row_PN = baris_total(jumlah_cabang(pos_cabang["PN"]), jumlah_sby(pos_sby["PN"]))
+    laporan.tambah("cabang_sby", "A2", pos_cabang["PN"], total_row_PN)
+    laporan.tambah("sby_cabang", "A2", pos_sby["PN"], total_row_PN)
+
+    # --- PROSES MATCHING (BKK/BKM) ---
+    # Satu hash-join per sisi: sisa SBY dicocokkan ke BKK/BKM CABANG (A3/A4),
+    # sisa CABANG dicocokkan ke BKK/BKM SBY (A5/A6).
+    with _tahap(pencatat, "cocok_id", baris_masuk=pos_cabang["sisa"].size + pos_sby["sisa"].size) as catatan:
+        id_1_cabang = dasar_cabang["ID_1"].to_numpy()
+        id_1_sby = dasar_sby["ID_1"].to_numpy()
+        sby_bkk_matched, sby_bkm_matched, sisa_sby = cocokkan_id(
+            dasar_sby, pos_sby["sisa"], id_1_cabang[pos_cabang["bkk"]], id_1_cabang[pos_cabang["bkm"]]
+        )
+        cabang_bkk_matched, cabang_bkm_matched, sisa_cabang = cocokkan_id(
+            dasar_cabang, pos_cabang["sisa"], id_1_sby[pos_sby["bkk"]], id_1_sby[pos_sby["bkm"]]
+        )
+        catatan["baris_keluar"] = sisa_cabang.size + sisa_sby.size
+
+    total_row_bkk = baris_total(jumlah_cabang(pos_cabang["bkk"]), jumlah_sby(sby_bkk_matched))
+    laporan.tambah("cabang_sby", "A3", pos_cabang["bkk"], total_row_bkk)
+    laporan.tambah("sby_cabang", "A3", sby_bkk_matched, total_row_bkk)
+
+    total_row_bkm = baris_total(jumlah_cabang(pos_cabang["bkm"]), jumlah_sby(sby_bkm_matched))
+    laporan.tambah("cabang_sby", "A4", pos_cabang["bkm"], total_row_bkm)
+    laporan.tambah("sby_cabang", "A4", sby_bkm_matched, total_row_bkm)
+
+    total_row_bkk_2 = baris_total(jumlah_sby(pos_sby["bkk"]), jumlah_cabang(cabang_bkk_matched))
+    laporan.tambah("sby_cabang", "A5", pos_sby["bkk"], total_row_bkk_2)
+    laporan.tambah("cabang_sby", "A5", cabang_bkk_matched, total_row_bkk_2)
+
+    total_row_bkm_2 = baris_total(jumlah_sby(pos_sby["bkm"]), jumlah_cabang(cabang_bkm_matched))
+    laporan.tambah("sby_cabang", "A6", pos_sby["bkm"], total_row_bkm_2)
+    laporan.tambah("cabang_sby", "A6", cabang_bkm_matched, total_row_bkm_2)
+
+    # --- PROSES TOTAL (JMU) ---
+    laporan.tambah("sby_cabang", "B1", pos_sby["jmu"], baris_total(jumlah_sby(pos_sby["jmu"])))
+
+    # --- GANTUNGAN PERIODE SEBELUMNYA ---
+    n_asli_cabang, n_asli_sby = len(dasar_cabang), len(dasar_sby)
+    if gantungan is not None:
+        with _tahap(pencatat, "gantungan", baris_masuk=sisa_cabang.size + sisa_sby.size) as catatan:
+            nominal = np.concatenate([
+                dasar_cabang["Debet"].to_numpy()[sisa_cabang] - dasar_cabang["Kredit"].to_numpy()[sisa_cabang],
+                dasar_sby["Debet"].to_numpy()[sisa_sby] - dasar_sby["Kredit"].to_numpy()[sisa_sby],
+            ])
+            # "cabang_sby" < "sby_cabang": id_bawaan urut sama dengan baris yang ditempelkan.
+            bawaan = gantungan.kandidat(nominal, periode).sort_values("sisi", kind="stable", ignore_index=True)
+            id_bawaan = bawaan.pop("id_gantungan").to_numpy()
+            dari_cabang = (bawaan["sisi"] == "cabang_sby").to_numpy()
+            dasar_cabang, sisa_cabang = _tambah_bawaan(dasar_cabang, sisa_cabang, bawaan[dari_cabang])
+            dasar_sby, sisa_sby = _tambah_bawaan(dasar_sby, sisa_sby, bawaan[~dari_cabang])
+            laporan.dasar = {"cabang_sby": dasar_cabang, "sby_cabang": dasar_sby}
+            catatan["baris_keluar"] = len(bawaan)
+
+    # --- PROSES REKONSILIASI GANTUNGAN (OFFSET) ---
+    # Sisa kedua sisi digabung hanya sebagai array nominal; posisi hasil
+    # dipetakan kembali ke frame dasar masing-masing.
+    debet = np.concatenate([dasar_cabang["Debet"].to_numpy()[sisa_cabang], dasar_sby["Debet"].to_numpy()[sisa_sby]])
+    kredit = np.concatenate([dasar_cabang["Kredit"].to_numpy()[sisa_cabang], dasar_sby["Kredit"].to_numpy()[sisa_sby]])
+    with _tahap(pencatat, "offset", baris_masuk=debet.size) as catatan:
+        if partisi:
+            hilang = [col for col in partisi if col not in dasar_cabang.columns or col not in dasar_sby.columns]
+            if hilang:
+                raise ValueError(f"Kolom partisi tidak ada di file: {', '.join(hilang)}")
+            kunci = kunci_partisi(pd.concat(
+                [dasar_cabang[partisi].take(sisa_cabang), dasar_sby[partisi].take(sisa_sby)], ignore_index=True
+            ), partisi, jendela_hari)
+            posisi, id_grup, laporan.waktu_habis, ambigu = cari_offset_partisi(
+                debet, kredit, kunci, batas_waktu=batas_waktu, proses=proses
+            )
+            catatan["partisi"] = int(kunci.max()) + 1 if kunci.size else 0
+        else:
+            posisi, id_grup, laporan.waktu_habis, ambigu = cari_offset(debet, kredit, batas_waktu=batas_waktu)
+        catatan["baris_keluar"] = posisi.size
+
+    id_offset = np.full(debet.size, -1, dtype=np.int64)
+    id_offset[posisi] = id_grup
+    # Offset urut per grup (Debet lalu Kredit terbesar dulu); gantung urut Debet lalu Kredit menurun.
+    urut_offset = posisi[np.lexsort((-kredit[posisi], -debet[posisi], id_offset[posisi]))]
+    gantung = np.flatnonzero(id_offset < 0)
+    urut_gantung = gantung[np.lexsort((-kredit[gantung], -debet[gantung]))]
+
+    n_cabang = sisa_cabang.size
+    offset_cabang = urut_offset[urut_offset < n_cabang]
+    offset_sby = urut_offset[urut_offset >= n_cabang]
+    total_offset = baris_total((int(debet[urut_offset].sum()), int(kredit[urut_offset].sum())))
+    posisi_cabang = sisa_cabang[offset_cabang]
+    posisi_sby = sisa_sby[offset_sby - n_cabang]
+    laporan.tambah("cabang_sby", "C1", posisi_cabang, total_offset, kolom={
+        "Sumber": np.where(posisi_cabang < n_asli_cabang, "cabang_sby", "gantungan"), "Posisi": "OFFSET",
+        "ID_Offset": pd.array(id_offset[offset_cabang] + 1, dtype="Int64"),
+    })
+    laporan.tambah("sby_cabang", "C1", posisi_sby, total_offset, kolom={
+        "Sumber": np.where(posisi_sby < n_asli_sby, "sby_cabang", "gantungan"), "Posisi": "OFFSET",
+        "ID_Offset": pd.array(id_offset[offset_sby] + 1, dtype="Int64"),
+    })
+    # Hanya baris yang tampil di D1/D2 (bukan baris bawaan gantungan) yang dilaporkan ambigu.
+    laporan.ambigu = int((sisa_cabang[ambigu[ambigu < n_cabang]] < n_asli_cabang).sum()
+                         + (sisa_sby[ambigu[ambigu >= n_cabang] - n_cabang] < n_asli_sby).sum())
+    if gantungan is not None:
+        # Baris bawaan berada di ujung frame dasar, urut sesuai id_bawaan.
+        n_bawaan_cabang = len(dasar_cabang) - n_asli_cabang
+        laporan.gantungan_terpakai = np.concatenate([
+            id_bawaan[posisi_cabang[posisi_cabang >= n_asli_cabang] - n_asli_cabang],
+            id_bawaan[n_bawaan_cabang + posisi_sby[posisi_sby >= n_asli_sby] - n_asli_sby],
+        ])
+
+    # Baris bawaan yang tetap gantung tidak diulang di D1/D2; baris itu masih di simpanan.
+    gantung_cabang = sisa_cabang[urut_gantung[urut_gantung < n_cabang]]
+    gantung_cabang = gantung_cabang[gantung_cabang < n_asli_cabang]
+    laporan.tambah("cabang_sby", "D1", gantung_cabang, baris_total(jumlah_cabang(gantung_cabang), selisih=False), kolom={
+        "Sumber": "cabang_sby", "Posisi": "GANTUNG",
+    })
+    gantung_sby = sisa_sby[urut_gantung[urut_gantung >= n_cabang] - n_cabang]
+    gantung_sby = gantung_sby[gantung_sby < n_asli_sby]
+    laporan.tambah("sby_cabang", "D2", gantung_sby, baris_total(jumlah_sby(gantung_sby), selisih=False), kolom={
+        "Sumber": "sby_cabang", "Posisi": "GANTUNG",
+    })
+
+    return laporan
+
+
+# ---------------------------------------------------------------------
+# EKSPOR
+# ---------------------------------------------------------------------
+def _kosong(nilai):
+    return nilai is None or nilai is pd.NA or (isinstance(nilai, float) and nilai != nilai)
+
+
+FORMAT_TANGGAL_XLSX = "yyyy-mm-dd"
+FORMAT_WAKTU_XLSX = "yyyy-mm-dd hh:mm:ss"   # tanggal yang memiliki jam
+
+
+def _teks_csv(nilai):
+    if _kosong(nilai):
+        return ""
+    return teks_sel(nilai) if isinstance(nilai, datetime.datetime) else nilai
+
+
+def tulis_excel(laporan, tujuan):
+    """
+    Tulis laporan ke xlsx dengan mode constant_memory xlsxwriter.
+
+    Baris dialirkan langsung dari LaporanRK.baris(), termasuk baris total
+    dan baris kosong, tanpa membentuk DataFrame per lembar.
+    """
+    workbook = xlsxwriter.Workbook(tujuan, {"constant_memory": True, "default_date_format": FORMAT_TANGGAL_XLSX})
+    # Format header sama seperti header bawaan DataFrame.to_excel.
+    header = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    waktu = workbook.add_format({"num_format": FORMAT_WAKTU_XLSX})
+    for sisi in URUTAN_GRUP:
+        worksheet = workbook.add_worksheet(sisi)
+        worksheet.write_row(0, 0, columns_final, header)
+        for r, baris in enumerate(laporan.baris(sisi), start=1):
+            for c, nilai in enumerate(baris):
+                if _kosong(nilai):
+                    continue
+                if isinstance(nilai, datetime.datetime) and nilai.time() != datetime.time():
+                    worksheet.write_datetime(r, c, nilai, waktu)
+                else:
+                    worksheet.write(r, c, nilai)
+    workbook.close()
+
+
+def tulis_csv_zip(laporan, tujuan):
+    """Tulis setiap lembar sebagai CSV (tata letak sama dengan xlsx) di dalam satu zip."""
+    with zipfile.ZipFile(tujuan, "w", compression=zipfile.ZIP_DEFLATED) as arsip:
+        for sisi in URUTAN_GRUP:
+            with arsip.open(f"{sisi}.csv", "w") as berkas:
+                teks = io.TextIOWrapper(berkas, encoding="utf-8-sig", newline="")
+                penulis = csv.writer(teks)
+                penulis.writerow(columns_final)
+                for baris in laporan.baris(sisi):
+                    # Baris kosong tetap ditulis sebagai sel kosong agar jarak antar grup terlihat.
+                    penulis.writerow([_teks_csv(nilai) for nilai in baris] or [""] * len(columns_final))
+                teks.flush()
+                teks.detach()
+
+
+def tulis_parquet_zip(laporan, tujuan):
+    """Tulis baris data setiap lembar (tanpa baris total/kosong) sebagai Parquet di dalam satu zip."""
+    with zipfile.ZipFile(tujuan, "w") as arsip:
+        for sisi in URUTAN_GRUP:
+            with arsip.open(f"{sisi}.parquet", "w") as berkas:
+                laporan.data(sisi).to_parquet(berkas, index=False)
+
+
+FORMAT_EKSPOR = {
+    "xlsx": {
+        "label": "Excel (.xlsx)", "ekstensi": "xlsx", "tulis": tulis_excel,
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+    "csv": {"label": "CSV (.zip)", "ekstensi": "zip", "tulis": tulis_csv_zip, "mime": "application/zip"},
+}
+if CSV_ENGINE == "pyarrow":
+    FORMAT_EKSPOR["parquet"] = {
+        "label": "Parquet (.zip)", "ekstensi": "zip", "tulis": tulis_parquet_zip, "mime": "application/zip",
+    }
+
+
+def ekspor(laporan, format_ekspor="xlsx", tujuan=None):
+    """
+    Ekspor laporan ke format di FORMAT_EKSPOR dan kembalikan bytes-nya. Bila
+    `tujuan` (path atau objek file biner) diberikan, laporan ditulis langsung
+    ke sana tanpa salinan di memori dan `tujuan` yang dikembalikan.
+    """
+    if tujuan is not None:
+        FORMAT_EKSPOR[format_ekspor]["tulis"](laporan, tujuan)
+        return tujuan
+    output_buffer = io.BytesIO()
+    FORMAT_EKSPOR[format_ekspor]["tulis"](laporan, output_buffer)
+    return output_buffer.getvalue()
+
+
+def ukuran_berkas(berkas):
+    """Banyak byte hasil ekspor: bytes, path, atau objek file (posisi saat ini)."""
+    if isinstance(berkas, (bytes, bytearray)):
+        return len(berkas)
+    if isinstance(berkas, (str, os.PathLike)):
+        return os.path.getsize(berkas)
+    return berkas.tell()
+
+
+def proses_rekonsiliasi(cabang_sby_file, sby_cabang_file, selisih_sebelumnya=0,
+                        batas_waktu=BATAS_WAKTU_DETIK, format_ekspor="xlsx", pencatat=None,
+                        gantungan=None, periode=None, partisi=None, jendela_hari=JENDELA_TANGGAL_HARI,
+                        proses=None, tujuan=None):
+    """
+    Jalankan seluruh pipeline untuk satu pasang file CABANG - SBY & SBY - CABANG.
+
+    Mengembalikan dict dengan kunci "berkas" (bytes hasil ekspor sesuai
+    `format_ekspor`, atau `tujuan` bila hasil ditulis ke path/file itu, lihat
+    ekspor), "waktu_habis" (True jika pencarian kombinasi offset terpotong
+    batas waktu), "ambigu" (banyak baris GANTUNG yang kombinasi N:1-nya
+    tidak tunggal, lihat cocokkan_subset) dan "ringkasan"
+    (LaporanRK.ringkasan). Bila `pencatat` (PencatatTahap) diberikan, catatan
+    setiap tahap juga dikembalikan di kunci "tahap".
+
+    Dengan `gantungan` (GudangGantungan) dan `periode`, kunci "gantungan"
+    berisi {"terpakai": id baris tersimpan yang ter-offset, "baru": baris
+    GANTUNG periode ini}; simpanan baru diperbarui oleh pemanggil lewat
+    GudangGantungan.simpan. `partisi`, `jendela_hari` dan `proses`
+    diteruskan ke susun_laporan (offset per partisi).
+    """
+    with _tahap(pencatat, "baca") as catatan:
+        mentah_cabang = baca_tabel(cabang_sby_file, columns)
+        mentah_sby = baca_tabel(sby_cabang_file, columns)
+        catatan["baris_keluar"] = len(mentah_cabang) + len(mentah_sby)
+
+    with _tahap(pencatat, "klasifikasi", baris_masuk=len(mentah_cabang) + len(mentah_sby)) as catatan:
+        cabang = klasifikasi_keperluan(siapkan_data(mentah_cabang), ATURAN_CABANG_SBY)
+        sby = klasifikasi_keperluan(siapkan_data(mentah_sby), ATURAN_SBY_CABANG)
+        del mentah_cabang, mentah_sby
+        catatan["baris_keluar"] = len(cabang[0]) + len(sby[0])
+        catatan["memori_frame_mb"] = (ukuran_frame(cabang[0]) + ukuran_frame(sby[0])) / 2**20
+
+    laporan = susun_laporan(
+        cabang, sby, selisih_sebelumnya, batas_waktu=batas_waktu, pencatat=pencatat,
+        gantungan=gantungan, periode=periode, partisi=partisi, jendela_hari=jendela_hari, proses=proses,
+    )
+
+    with _tahap(pencatat, "ekspor", baris_masuk=len(cabang[0]) + len(sby[0])) as catatan:
+        berkas = ekspor(laporan, format_ekspor, tujuan)
+        catatan["bytes_keluar"] = ukuran_berkas(berkas)
+    hasil = {
+        "berkas": berkas, "waktu_habis": laporan.waktu_habis, "ambigu": laporan.ambigu,
+        "ringkasan": laporan.ringkasan(),
+    }
+    if gantungan is not None:
+        hasil["gantungan"] = {"terpakai": laporan.gantungan_terpakai.tolist(), "baru": laporan.baris_gantung()}
+    if pencatat is not None:
+        hasil["tahap"] = list(pencatat.catatan)
+    return hasil
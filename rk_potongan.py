@@ -0,0 +1,455 @@
+"""
+Mode potongan (out-of-core) untuk file ekspor yang tidak muat di memori.
+
+Kedua file dibaca per `ukuran_potongan` baris dan setiap potongan langsung
+diklasifikasi. Baris VA/RI, PN, JMU dan BKK/BKM dijumlahkan sambil jalan
+lalu ditulis apa adanya ke berkas grupnya di disk. Baris sisa ditumpahkan
+ke disk dalam partisi:
+
+1. partisi ID - sisa menurut ID Dokumen dan kunci BKK/BKM sisi lawan
+   menurut ID_1, sehingga pencocokan ID (A3-A6) memuat satu partisi saja;
+2. partisi nominal - entri Debet/Kredit baris yang tidak cocok ID
+   (beberapa int64 per baris, barisnya sendiri tetap di partisi ID)
+   menurut nilainya, sehingga pasangan nilai persis (offset 1:1) dicari per
+   partisi. Untuk pencarian grup N:1 global hanya entri yang masih tersisa
+   yang dikumpulkan.
+
+Baris C1/D1/D2 ditulis per partisi dalam urutan laporan, lalu digabung
+(k-way merge) saat ekspor. Urutan baris, nomor ID_Offset dan total sama
+dengan proses_rekonsiliasi. Gantungan antar periode, offset per partisi
+kolom dan ekspor Parquet tidak tersedia di mode ini.
+
+    python rk_batch.py data_tahunan --potongan 200000
+"""
+import heapq
+import operator
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from rk_pipeline import (
+    ATURAN_CABANG_SBY, ATURAN_SBY_CABANG, BATAS_WAKTU_DETIK, KATEGORI_SISA, UKURAN_POTONGAN, LaporanRK,
+    _susun_offset, _tahap, baca_tabel_potongan, baris_total, cocokkan_id, cocokkan_subset, columns, ekspor,
+    klasifikasi_keperluan, kolom_laporan, pasangan_persis, siapkan_data, terapkan_skema, ukuran_berkas,
+)
+
+UKURAN_POTONGAN_BACA = 200_000   # baris per potongan saat membaca file
+JUMLAH_PARTISI = 64              # partisi ID dan partisi nominal
+BATAS_TUNDA_BAGIAN = 1_000       # bagian tumpahan yang ditahan di memori sebelum ditulis
+FORMAT_POTONGAN = ("xlsx", "csv")  # format ekspor yang mengalirkan baris
+
+# Urutan sisi di pool offset (CABANG dulu, lalu SBY), sama seperti susun_laporan.
+URUTAN_SISI = {"cabang_sby": 0, "sby_cabang": 1}
+KODE_SISI = 1 << 40   # kode baris di pool offset: urut_sisi * KODE_SISI + index
+
+# Kunci urut baris per jenis berkas gabungan: (kolom, naik).
+KUNCI_OFFSET = [("ID_Offset", True), ("Debet", False), ("Kredit", False), ("index", True)]
+KUNCI_GANTUNG = [("Debet", False), ("Kredit", False), ("index", True)]
+KUNCI_INDEX = [("index", True)]
+
+
+class Tumpahan:
+    """
+    Folder sementara berisi berkas tumpahan. Setiap berkas adalah deret
+    DataFrame (pickle) yang ditambahkan per potongan dan dibaca kembali
+    potongan demi potongan. Folder dihapus saat `tutup`.
+
+    Bagian kecil (tumpahan per partisi) sebaiknya lewat `tunda`: ditahan di
+    memori sampai `batas_tunda` baris atau BATAS_TUNDA_BAGIAN bagian lalu
+    ditulis sekaligus, agar tidak ada ribuan pickle kecil.
+    """
+
+    def __init__(self, folder=None, batas_tunda=UKURAN_POTONGAN):
+        self._tmp = tempfile.TemporaryDirectory(prefix="rk_potongan_", dir=folder)
+        self.folder = self._tmp.name
+        self.batas_tunda = batas_tunda
+        self._tunda = {}
+        self._n_tunda = self._n_bagian = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.tutup()
+
+    def _path(self, nama):
+        return os.path.join(self.folder, nama.replace("/", "__") + ".pkl")
+
+    def tambah(self, nama, df, per=None):
+        """Tambahkan df ke berkas `nama`, dipecah per `per` baris bila diisi."""
+        langkah = per or max(len(df), 1)
+        with open(self._path(nama), "ab") as berkas:
+            for mulai in range(0, len(df), langkah):
+                pickle.dump(df.iloc[mulai:mulai + langkah], berkas, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def tunda(self, nama, df):
+        """Seperti tambah, tetapi ditulis nanti bersama bagian lain (lihat siram)."""
+        self._tunda.setdefault(nama, []).append(df)
+        self._n_tunda += len(df)
+        self._n_bagian += 1
+        if self._n_tunda >= self.batas_tunda or self._n_bagian >= BATAS_TUNDA_BAGIAN:
+            self.siram()
+
+    def siram(self):
+        """Tulis semua bagian yang masih ditahan `tunda`."""
+        for nama, bagian in self._tunda.items():
+            self.tambah(nama, pd.concat(bagian, ignore_index=True) if len(bagian) > 1 else bagian[0])
+        self._tunda = {}
+        self._n_tunda = self._n_bagian = 0
+
+    def potongan(self, nama):
+        """DataFrame-DataFrame berkas `nama` sesuai urutan penulisan (kosong bila tidak ada)."""
+        if nama in self._tunda:
+            self.siram()
+        if not os.path.exists(self._path(nama)):
+            return
+        with open(self._path(nama), "rb") as berkas:
+            while True:
+                try:
+                    yield pickle.load(berkas)
+                except EOFError:
+                    return
+
+    def baca(self, nama):
+        """Seluruh isi berkas `nama` sebagai satu DataFrame, atau None bila kosong."""
+        bagian = list(self.potongan(nama))
+        if not bagian:
+            return None
+        # Kategori tiap potongan berbeda; satukan kembali setelah digabung.
+        return terapkan_skema(pd.concat(bagian, ignore_index=True))
+
+    def hapus(self, nama):
+        self._tunda.pop(nama, None)
+        if os.path.exists(self._path(nama)):
+            os.remove(self._path(nama))
+
+    def tutup(self):
+        self._tmp.cleanup()
+
+
+def _partisi(nilai, jumlah_partisi):
+    """Nomor partisi dari hash nilai; nilai yang sama selalu masuk partisi yang sama."""
+    nilai = np.asarray(nilai)
+    if nilai.dtype.kind not in "iu":
+        nilai = pd.Series(nilai, dtype="str").fillna("").to_numpy(dtype=object)
+    return (pd.util.hash_array(nilai) % jumlah_partisi).astype(np.int64)
+
+
+def _tumpah_partisi(tumpahan, awalan, df, nomor):
+    for p, bagian in df.groupby(nomor, sort=False):
+        tumpahan.tunda(f"{awalan}/{p}", bagian)
+
+
+def _ukuran_run(jumlah_partisi):
+    """
+    Baris per pickle berkas run. Saat ekspor semua run satu grup dibaca
+    bersamaan, jadi totalnya tetap sekitar UKURAN_POTONGAN baris.
+    """
+    return max(UKURAN_POTONGAN // jumlah_partisi, 100)
+
+
+def _tambah_jumlah(jumlah, kunci, df):
+    """Akumulasi (Debet sen, Kredit sen, baris) di jumlah[kunci]."""
+    debet, kredit, baris = jumlah.get(kunci, (0, 0, 0))
+    jumlah[kunci] = (debet + int(df["Debet"].sum()), kredit + int(df["Kredit"].sum()), baris + len(df))
+
+
+def _baca_sisi(tumpahan, file, sisi, aturan, ukuran_potongan, jumlah_partisi, jumlah):
+    """Baca satu file per potongan, klasifikasi, lalu tumpahkan barisnya. Mengembalikan (baris, potongan)."""
+    n_baris = n_potongan = 0
+    for mentah in baca_tabel_potongan(file, columns, ukuran_potongan):
+        df = siapkan_data(mentah)
+        df.insert(0, "index", np.arange(n_baris, n_baris + len(df)))
+        n_baris += len(df)
+        n_potongan += 1
+        df, posisi = klasifikasi_keperluan(df, aturan)
+        for kategori, pos in posisi.items():
+            bagian = df.take(pos)
+            _tambah_jumlah(jumlah, (sisi, kategori), bagian)
+            if kategori == KATEGORI_SISA:
+                _tumpah_partisi(tumpahan, f"id_sisa_{sisi}", bagian, _partisi(bagian["ID Dokumen"], jumlah_partisi))
+                continue
+            tumpahan.tambah(f"{sisi}_{kategori}", bagian)
+            if kategori in ("bkk", "bkm"):
+                kunci = pd.DataFrame({"ID": bagian["ID_1"].to_numpy(), "jenis": kategori})
+                _tumpah_partisi(tumpahan, f"id_kunci_{sisi}", kunci, _partisi(kunci["ID"], jumlah_partisi))
+    return n_baris, n_potongan
+
+
+def _cocokkan_partisi_id(tumpahan, p, jumlah_partisi, jumlah):
+    """
+    Pencocokan BKK/BKM (seperti cocokkan_id) untuk partisi ID `p`. Baris
+    yang tidak cocok tetap di partisi ID (berkas "tinggal"); entri nominalnya
+    ditumpahkan ke partisi nominal.
+    """
+    for sisi, lawan in (("sby_cabang", "cabang_sby"), ("cabang_sby", "sby_cabang")):
+        sisa = tumpahan.baca(f"id_sisa_{sisi}/{p}")
+        kunci = tumpahan.baca(f"id_kunci_{lawan}/{p}")
+        tumpahan.hapus(f"id_sisa_{sisi}/{p}")
+        tumpahan.hapus(f"id_kunci_{lawan}/{p}")
+        if sisa is None:
+            continue
+        if kunci is None:
+            kunci = pd.DataFrame({"ID": pd.array([], dtype="str"), "jenis": pd.array([], dtype="str")})
+        id_kunci, jenis = kunci["ID"].to_numpy(), kunci["jenis"].to_numpy()
+        cocok_bkk, cocok_bkm, tinggal = cocokkan_id(
+            sisa, np.arange(len(sisa)), id_kunci[jenis == "bkk"], id_kunci[jenis == "bkm"]
+        )
+        for kategori, pos in (("bkk", cocok_bkk), ("bkm", cocok_bkm)):
+            bagian = sisa.take(pos)
+            _tambah_jumlah(jumlah, (sisi, f"cocok_{kategori}"), bagian)
+            tumpahan.tambah(f"cocok_{sisi}_{kategori}/{p}", bagian, per=_ukuran_run(jumlah_partisi))
+        bagian = sisa.take(tinggal).assign(urut_sisi=URUTAN_SISI[sisi])
+        _tambah_jumlah(jumlah, (sisi, "tinggal"), bagian)
+        tumpahan.tambah(f"tinggal/{p}", bagian)
+        # Hanya entri nominal (debit dan kredit terpisah, plus partisi ID barisnya)
+        # yang dipartisi menurut nilai: pasangan persis selalu di partisi yang sama.
+        for debit, kolom in ((True, "Debet"), (False, "Kredit")):
+            nilai = bagian[kolom].to_numpy()
+            ada = nilai > 0
+            entri = pd.DataFrame({
+                "partisi": p, "urut_sisi": URUTAN_SISI[sisi], "index": bagian["index"].to_numpy()[ada],
+                "nilai": nilai[ada], "debit": debit,
+            })
+            _tumpah_partisi(tumpahan, "entri", entri, _partisi(entri["nilai"], jumlah_partisi))
+
+
+def _cari_offset(tumpahan, jumlah_partisi, batas_waktu):
+    """
+    Padanan cari_offset di atas partisi entri nominal. Pasangan persis dicari
+    per partisi; dari sisanya hanya kode baris (urut_sisi, index) dan
+    nominalnya yang dikumpulkan untuk cocokkan_subset global, lalu dirakit
+    dengan _susun_offset seperti cari_offset. Hasilnya DataFrame (partisi,
+    urut_sisi, index, id) per baris ter-offset, status waktu habis dan banyak
+    baris ambigu (lihat cari_offset).
+    """
+    kosong = np.zeros(0, dtype=np.int64)
+    persis_debit, persis_kredit = [kosong], [kosong]
+    sisa_debit, sisa_kredit, nilai_debit, nilai_kredit = [kosong], [kosong], [kosong], [kosong]
+    kode_baris, partisi_baris = [kosong], [kosong]
+    for p in range(jumlah_partisi):
+        entri = tumpahan.baca(f"entri/{p}")
+        tumpahan.hapus(f"entri/{p}")
+        if entri is None:
+            continue
+        # Kode urut seperti posisi di pool cari_offset (sisi, lalu nomor baris).
+        kode = entri["urut_sisi"].to_numpy(dtype=np.int64) * KODE_SISI + entri["index"].to_numpy(dtype=np.int64)
+        urut = np.argsort(kode, kind="stable")
+        kode, nilai, debit = kode[urut], entri["nilai"].to_numpy()[urut], entri["debit"].to_numpy()[urut]
+        kode_baris.append(kode)
+        partisi_baris.append(entri["partisi"].to_numpy(dtype=np.int64)[urut])
+        kode_debit, kode_kredit = kode[debit], kode[~debit]
+        pos_debit, pos_kredit = pasangan_persis(nilai[debit], nilai[~debit])
+        persis_debit.append(kode_debit[pos_debit])
+        persis_kredit.append(kode_kredit[pos_kredit])
+        sisa = np.ones(kode_debit.size, dtype=bool)
+        sisa[pos_debit] = False
+        sisa_debit.append(kode_debit[sisa])
+        nilai_debit.append(nilai[debit][sisa])
+        sisa = np.ones(kode_kredit.size, dtype=bool)
+        sisa[pos_kredit] = False
+        sisa_kredit.append(kode_kredit[sisa])
+        nilai_kredit.append(nilai[~debit][sisa])
+
+    # Nomor pasangan persis mengikuti urutan debit di pool, seperti hasil merge di pasangan_persis.
+    persis_debit, persis_kredit = np.concatenate(persis_debit), np.concatenate(persis_kredit)
+    urut = np.argsort(persis_debit, kind="stable")
+    persis_debit, persis_kredit = persis_debit[urut], persis_kredit[urut]
+    sisa_debit, nilai_debit = np.concatenate(sisa_debit), np.concatenate(nilai_debit)
+    urut = np.argsort(sisa_debit, kind="stable")
+    sisa_debit, nilai_debit = sisa_debit[urut], nilai_debit[urut]
+    sisa_kredit, nilai_kredit = np.concatenate(sisa_kredit), np.concatenate(nilai_kredit)
+    urut = np.argsort(sisa_kredit, kind="stable")
+    sisa_kredit, nilai_kredit = sisa_kredit[urut], nilai_kredit[urut]
+    grup, waktu_habis, (ambigu_debit, ambigu_kredit) = cocokkan_subset(
+        nilai_debit, nilai_kredit, batas_waktu=batas_waktu
+    )
+
+    kode, id_grup = _susun_offset(persis_debit, persis_kredit, sisa_debit, sisa_kredit, grup)
+    ambigu = np.union1d(sisa_debit[ambigu_debit], sisa_kredit[ambigu_kredit])
+    kode_baris, partisi_baris = np.concatenate(kode_baris), np.concatenate(partisi_baris)
+    urut = np.argsort(kode_baris, kind="stable")
+    partisi = partisi_baris[urut][np.searchsorted(kode_baris[urut], kode)]
+    hasil = pd.DataFrame({"partisi": partisi, "urut_sisi": kode // KODE_SISI, "index": kode % KODE_SISI, "id": id_grup})
+    return hasil, waktu_habis, int(np.setdiff1d(ambigu, kode).size)
+
+
+def _tulis_offset(tumpahan, jumlah_partisi, id_offset, jumlah):
+    """Tulis baris C1 dan GANTUNG tiap partisi ID, masing-masing urut sesuai laporan."""
+    per_partisi = dict(tuple(id_offset.groupby("partisi")))
+    per = _ukuran_run(jumlah_partisi)
+    for p in range(jumlah_partisi):
+        df = tumpahan.baca(f"tinggal/{p}")
+        tumpahan.hapus(f"tinggal/{p}")
+        if df is None:
+            continue
+        ids = per_partisi.get(p, id_offset.iloc[:0])
+        df = df.merge(ids[["urut_sisi", "index", "id"]], on=["urut_sisi", "index"], how="left")
+        offset = df["id"].notna().to_numpy()
+        for sisi, urut_sisi in URUTAN_SISI.items():
+            milik = (df["urut_sisi"] == urut_sisi).to_numpy()
+            c1 = df[milik & offset].assign(ID_Offset=lambda d: d["id"].astype(np.int64) + 1)
+            _tambah_jumlah(jumlah, (sisi, "C1"), c1)
+            tumpahan.tambah(f"c1_{sisi}/{p}", _urutkan(c1, KUNCI_OFFSET), per=per)
+            gantung = df[milik & ~offset]
+            _tambah_jumlah(jumlah, (sisi, "gantung"), gantung)
+            tumpahan.tambah(f"gantung_{sisi}/{p}", _urutkan(gantung, KUNCI_GANTUNG), per=per)
+
+
+def _nilai_kunci(df, kunci):
+    """Array kunci urut (kolom turun dinegasikan) untuk `kunci` [(kolom, naik)]."""
+    return [df[col].to_numpy() if naik else -df[col].to_numpy() for col, naik in kunci]
+
+
+def _urutkan(df, kunci):
+    return df.take(np.lexsort(_nilai_kunci(df, kunci)[::-1]))
+
+
+class LaporanPotongan(LaporanRK):
+    """
+    LaporanRK yang baris datanya dibaca dari berkas Tumpahan, bukan dari
+    frame dasar di memori. Grup dengan `kunci` berasal dari beberapa
+    berkas yang masing-masing sudah urut dan digabung per baris (k-way
+    merge) saat diekspor.
+    """
+
+    def __init__(self, tumpahan):
+        super().__init__({})
+        self.tumpahan = tumpahan
+
+    def tambah_berkas(self, sisi, kode, berkas, jumlah, total, kunci=None, kolom=None, baris_awal=None):
+        """Daftarkan grup `kode` di lembar `sisi` dari daftar `berkas` tumpahan."""
+        self.grup[sisi, kode] = {
+            "berkas": berkas,
+            "kunci": kunci,
+            "jumlah": jumlah,
+            "total": total,
+            "kolom": kolom or {},
+            "baris_awal": baris_awal or [],
+        }
+
+    def _baris_berkas(self, nama, kode, kolom, kunci):
+        for df in self.tumpahan.potongan(nama):
+            baris = zip(*kolom_laporan(df, kode, np.arange(len(df)), kolom))
+            if kunci is None:
+                yield from baris
+            else:
+                yield from zip(zip(*[nilai.tolist() for nilai in _nilai_kunci(df, kunci)]), baris)
+
+    def _baris_data(self, sisi, kode):
+        g = self.grup[sisi, kode]
+        sumber = [self._baris_berkas(nama, kode, g["kolom"], g["kunci"]) for nama in g["berkas"]]
+        if g["kunci"] is None:
+            for baris in sumber:
+                yield from baris
+        else:
+            for _, baris in heapq.merge(*sumber, key=operator.itemgetter(0)):
+                yield baris
+
+    def data(self, sisi):
+        raise ValueError(f"Mode potongan hanya mendukung ekspor {', '.join(FORMAT_POTONGAN)}")
+
+    def baris_gantung(self):
+        raise ValueError("Mode potongan tidak mendukung simpanan gantungan")
+
+
+def _susun_laporan(tumpahan, jumlah, jumlah_partisi, selisih_sebelumnya, waktu_habis, ambigu):
+    """LaporanPotongan dengan grup dan total yang sama seperti susun_laporan."""
+    def dk(sisi, kategori):
+        return jumlah.get((sisi, kategori), (0, 0, 0))[:2]
+
+    def n(sisi, kategori):
+        return jumlah.get((sisi, kategori), (0, 0, 0))[2]
+
+    def per_partisi(awalan):
+        return [f"{awalan}/{p}" for p in range(jumlah_partisi)]
+
+    laporan = LaporanPotongan(tumpahan)
+    laporan.waktu_habis = waktu_habis
+    laporan.ambigu = ambigu
+    c, s = "cabang_sby", "sby_cabang"
+
+    baris_sebelumnya = {"Debet": int(round(selisih_sebelumnya * 100))}
+    total_va_ri = baris_total((baris_sebelumnya["Debet"], 0), dk(c, "va_ri"), dk(s, "va_ri"))
+    laporan.tambah_berkas(s, "A1", [f"{s}_va_ri"], n(s, "va_ri"), total_va_ri)
+    laporan.tambah_berkas(c, "A1", [f"{c}_va_ri"], n(c, "va_ri"), total_va_ri, baris_awal=[baris_sebelumnya])
+
+    total_pn = baris_total(dk(c, "PN"), dk(s, "PN"))
+    laporan.tambah_berkas(c, "A2", [f"{c}_PN"], n(c, "PN"), total_pn)
+    laporan.tambah_berkas(s, "A2", [f"{s}_PN"], n(s, "PN"), total_pn)
+
+    # A3/A4: BKK/BKM CABANG dengan sisa SBY yang cocok; A5/A6 sebaliknya.
+    for kode, kode_lawan, kategori in (("A3", "A5", "bkk"), ("A4", "A6", "bkm")):
+        total = baris_total(dk(c, kategori), dk(s, f"cocok_{kategori}"))
+        laporan.tambah_berkas(c, kode, [f"{c}_{kategori}"], n(c, kategori), total)
+        laporan.tambah_berkas(s, kode, per_partisi(f"cocok_{s}_{kategori}"), n(s, f"cocok_{kategori}"), total,
+                              kunci=KUNCI_INDEX)
+        total = baris_total(dk(s, kategori), dk(c, f"cocok_{kategori}"))
+        laporan.tambah_berkas(s, kode_lawan, [f"{s}_{kategori}"], n(s, kategori), total)
+        laporan.tambah_berkas(c, kode_lawan, per_partisi(f"cocok_{c}_{kategori}"), n(c, f"cocok_{kategori}"), total,
+                              kunci=KUNCI_INDEX)
+
+    laporan.tambah_berkas(s, "B1", [f"{s}_jmu"], n(s, "jmu"), baris_total(dk(s, "jmu")))
+
+    debet_c1, kredit_c1 = (a + b for a, b in zip(dk(c, "C1"), dk(s, "C1")))
+    total_offset = baris_total((debet_c1, kredit_c1))
+    for sisi, kode_gantung in ((c, "D1"), (s, "D2")):
+        laporan.tambah_berkas(sisi, "C1", per_partisi(f"c1_{sisi}"), n(sisi, "C1"), total_offset, kunci=KUNCI_OFFSET,
+                              kolom={"Sumber": sisi, "Posisi": "OFFSET"})
+        laporan.tambah_berkas(sisi, kode_gantung, per_partisi(f"gantung_{sisi}"), n(sisi, "gantung"),
+                              baris_total(dk(sisi, "gantung"), selisih=False), kunci=KUNCI_GANTUNG,
+                              kolom={"Sumber": sisi, "Posisi": "GANTUNG"})
+    return laporan
+
+
+def proses_rekonsiliasi_potongan(cabang_sby_file, sby_cabang_file, selisih_sebelumnya=0,
+                                 batas_waktu=BATAS_WAKTU_DETIK, format_ekspor="xlsx", pencatat=None,
+                                 ukuran_potongan=UKURAN_POTONGAN_BACA, jumlah_partisi=JUMLAH_PARTISI, folder=None,
+                                 tujuan=None):
+    """
+    Seperti proses_rekonsiliasi (kunci hasil "berkas", "waktu_habis",
+    "ambigu", "ringkasan", "tahap" dan `tujuan` sama), tetapi file dibaca per
+    `ukuran_potongan` baris dan baris kerja ditumpahkan ke `jumlah_partisi`
+    partisi di folder sementara di dalam `folder` (bawaan: folder temp
+    sistem). Untuk file sangat besar sebaiknya hasil ditulis ke `tujuan`
+    agar tidak ditampung di memori.
+    """
+    if format_ekspor not in FORMAT_POTONGAN:
+        raise ValueError(f"Mode potongan hanya mendukung ekspor {', '.join(FORMAT_POTONGAN)}")
+    jumlah = {}
+    with Tumpahan(folder, batas_tunda=ukuran_potongan) as tumpahan:
+        with _tahap(pencatat, "baca") as catatan:
+            n_cabang, potongan_cabang = _baca_sisi(tumpahan, cabang_sby_file, "cabang_sby", ATURAN_CABANG_SBY,
+                                                   ukuran_potongan, jumlah_partisi, jumlah)
+            n_sby, potongan_sby = _baca_sisi(tumpahan, sby_cabang_file, "sby_cabang", ATURAN_SBY_CABANG,
+                                             ukuran_potongan, jumlah_partisi, jumlah)
+            n_baris = n_cabang + n_sby
+            catatan["baris_keluar"] = n_baris
+            catatan["potongan"] = potongan_cabang + potongan_sby
+
+        def baris(kategori):
+            return sum(jumlah.get((sisi, kategori), (0, 0, 0))[2] for sisi in URUTAN_SISI)
+
+        with _tahap(pencatat, "cocok_id", baris_masuk=baris(KATEGORI_SISA)) as catatan:
+            for p in range(jumlah_partisi):
+                _cocokkan_partisi_id(tumpahan, p, jumlah_partisi, jumlah)
+            catatan["baris_keluar"] = baris("tinggal")
+
+        with _tahap(pencatat, "offset", baris_masuk=baris("tinggal")) as catatan:
+            id_offset, waktu_habis, ambigu = _cari_offset(tumpahan, jumlah_partisi, batas_waktu)
+            _tulis_offset(tumpahan, jumlah_partisi, id_offset, jumlah)
+            catatan["baris_keluar"] = baris("C1")
+            catatan["partisi"] = jumlah_partisi
+
+        laporan = _susun_laporan(tumpahan, jumlah, jumlah_partisi, selisih_sebelumnya, waktu_habis, ambigu)
+        with _tahap(pencatat, "ekspor", baris_masuk=n_baris) as catatan:
+            berkas = ekspor(laporan, format_ekspor, tujuan)
+            catatan["bytes_keluar"] = ukuran_berkas(berkas)
+
+    hasil = {"berkas": berkas, "waktu_habis": waktu_habis, "ambigu": ambigu, "ringkasan": laporan.ringkasan()}
+    if pencatat is not None:
+        hasil["tahap"] = list(pencatat.catatan)
+    return hasil
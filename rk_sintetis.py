@@ -0,0 +1,213 @@
+"""
+Pembuat data sintetis pasangan file CABANG - SBY & SBY - CABANG.
+
+Data mengikuti skema kolom dan pola Keperluan yang dipakai rk_pipeline
+(PN, BKK/BKM dengan ID dokumen sisi lawan, JMU ASD/ASK, VA/RI), dengan
+proporsi pasangan offset persis dan N:1 yang bisa diatur. Dipakai untuk
+benchmark tanpa perlu file cabang asli.
+
+    python rk_sintetis.py 10000 --folder data_uji
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from rk_pipeline import columns
+
+TAHUN = 2024
+
+# Proporsi kategori per sisi; sisanya menjadi baris "lain" (kandidat offset).
+PROPORSI_CABANG_SBY = {"PN": 0.10, "bkk": 0.12, "bkm": 0.08, "va_ri": 0.10}
+PROPORSI_SBY_CABANG = {"PN": 0.10, "jmu": 0.05, "bkk": 0.12, "bkm": 0.08, "va_ri": 0.10}
+
+MITRA = ["PT MERATUS LINE", "PT TANTO INTIM", "PT SPIL", "PT TEMAS", "PT PELNI", "CV SAMUDRA"]
+KAPAL = ["KM MERATUS PADANG 012", "KM TANTO AMAN 104", "KM SPIL HASYA 221", "KM TEMAS 88", "KM LAWIT 7"]
+PEMBUAT = ["ANDI", "BUDI", "CITRA", "DEWI", "EKO"]
+UNIT = ["DEPO SBY", "DEPO JKT", "DEPO MKS", "DEPO BPN"]
+DIVISI = ["KEUANGAN", "OPERASIONAL", "KOMERSIAL"]
+
+
+def _nominal(rng, n):
+    """Nominal rupiah acak (kelipatan 1.000, sebaran log-normal)."""
+    return np.maximum(1, np.rint(rng.lognormal(mean=7.0, sigma=1.4, size=n))).astype(np.int64) * 1000
+
+
+def _format_nominal(nilai):
+    """Format seperti ekspor sistem: "1,234,000", nol menjadi "-"."""
+    return [f"{v:,}" if v else "-" for v in nilai.tolist()]
+
+
+def _keperluan(kategori, nomor, id_rujukan, sisi):
+    teks = np.empty(kategori.size, dtype=object)
+    for i, (kat, no, ref) in enumerate(zip(kategori.tolist(), nomor.tolist(), id_rujukan.tolist())):
+        if kat == "PN":
+            teks[i] = f"PEMBAYARAN ATAS NOTA {no}"
+        elif kat == "bkk":
+            teks[i] = f"PELUNASAN IDBKK: {ref}" if sisi == "cabang" else f"TRANSFER BKK {ref}"
+        elif kat == "bkm":
+            teks[i] = f"PENERIMAAN BKM-{ref}" if sisi == "cabang" else f"SETORAN IDBKM {ref}"
+        elif kat == "jmu":
+            teks[i] = f"JMU ASD {no}" if no % 2 else f"JMU ASK {no}"
+        elif kat == "va_ri":
+            if sisi == "cabang":
+                teks[i] = "PENERIMAAN GIRO DENGAN VA" if no % 2 else f"KODE LAWAN RI {no}"
+            else:
+                teks[i] = ("PEMBAYARAN DPP GIRO", "KODE LAWAN RO", "PEMBAYARAN DPP TUNAI")[no % 3]
+        else:
+            teks[i] = f"BIAYA OPERASIONAL {no}" if no % 2 else f"TITIPAN SETORAN {no}"
+    return teks
+
+
+def _kategori(rng, n, proporsi):
+    nama = list(proporsi) + ["lain"]
+    peluang = list(proporsi.values()) + [1 - sum(proporsi.values())]
+    return rng.choice(np.array(nama, dtype=object), size=n, p=peluang)
+
+
+def _isi_offset(rng, debet_c, kredit_c, debet_s, kredit_s, bebas_c, bebas_s, rasio_persis, rasio_n1):
+    """Isi nominal baris bebas: pasangan persis, grup N:1 (1 debit CABANG = k kredit SBY), sisanya acak."""
+    bebas_c = rng.permutation(bebas_c)
+    bebas_s = rng.permutation(bebas_s)
+    total_bebas = bebas_c.size + bebas_s.size
+
+    # Pasangan persis lintas sisi (arah debit/kredit diacak).
+    m = min(int(rasio_persis * total_bebas / 2), bebas_c.size, bebas_s.size)
+    c, bebas_c = bebas_c[:m], bebas_c[m:]
+    s, bebas_s = bebas_s[:m], bebas_s[m:]
+    nilai = _nominal(rng, m)
+    arah = rng.random(m) < 0.5
+    debet_c[c[arah]], kredit_s[s[arah]] = nilai[arah], nilai[arah]
+    kredit_c[c[~arah]], debet_s[s[~arah]] = nilai[~arah], nilai[~arah]
+
+    # Grup N:1: satu debit di CABANG sama dengan jumlah 2-4 kredit di SBY.
+    target_baris = int(rasio_n1 * total_bebas)
+    dipakai = 0
+    while dipakai < target_baris and bebas_c.size and bebas_s.size >= 2:
+        k = int(min(rng.integers(2, 5), bebas_s.size))
+        bagian = _nominal(rng, k)
+        debet_c[bebas_c[0]] = bagian.sum()
+        kredit_s[bebas_s[:k]] = bagian
+        bebas_c, bebas_s = bebas_c[1:], bebas_s[k:]
+        dipakai += k + 1
+
+    # Sisanya nominal acak (umumnya akan GANTUNG).
+    for debet, kredit, baris in ((debet_c, kredit_c, bebas_c), (debet_s, kredit_s, bebas_s)):
+        nilai = _nominal(rng, baris.size)
+        arah = rng.random(baris.size) < 0.5
+        debet[baris[arah]] = nilai[arah]
+        kredit[baris[~arah]] = nilai[~arah]
+
+
+def _atribut(rng, n):
+    """Mitra, kapal dan hari ke- (dalam TAHUN) acak untuk n baris."""
+    return {"mitra": rng.choice(MITRA, n), "kapal": rng.choice(KAPAL, n), "hari": rng.integers(0, 365, n)}
+
+
+def _frame(rng, n, nomor_awal, kategori, debet, kredit, id_rujukan, sisi, atribut):
+    nomor = np.arange(nomor_awal, nomor_awal + n)
+    tanggal = pd.Timestamp(f"{TAHUN}-01-01") + pd.to_timedelta(atribut["hari"], unit="D")
+    data = {
+        "Tanggal Kasir": tanggal.strftime("%Y-%m-%d"),
+        "ID Dokumen": [f"{no}/{TAHUN}" for no in nomor.tolist()],
+        "Nomor Dokumen": [f"{sisi.upper()}-{no:08d}" for no in nomor.tolist()],
+        "Dibayarkan (ke/dari)": atribut["mitra"],
+        "Keperluan": _keperluan(kategori, nomor, id_rujukan, sisi),
+        "Vessel Voyage": atribut["kapal"],
+        "Debet": _format_nominal(debet),
+        "Kredit": _format_nominal(kredit),
+        "Tempat Pembayaran": rng.choice(["KAS", "BANK MANDIRI", "BANK BNI"], n),
+        "Pembuat": rng.choice(PEMBUAT, n),
+        "Sumber Dokumen": rng.choice(["KASIR", "AKUNTANSI"], n),
+        "Jenis Dokumen": np.where(debet > 0, "BKM", "BKK"),
+        "Tanggal Delivery": tanggal.strftime("%Y-%m-%d"),
+        "Nama Kode": rng.choice(["HUTANG AFILIASI", "PIUTANG AFILIASI"], n),
+        "Kode Accounting": rng.choice(["2101", "1301", "2102"], n),
+        "User Pengakuan": rng.choice(PEMBUAT, n),
+        "Unit": rng.choice(UNIT, n),
+        "Divisi": rng.choice(DIVISI, n),
+        "Flag KBM/KDRT": rng.choice(["KBM", "KDRT"], n),
+        "Target_First": rng.choice(["A", "B"], n),
+        "Target_Jenis": rng.choice(["RK", "NON RK"], n),
+        "Target_Second": rng.choice(["X", "Y"], n),
+    }
+    return pd.DataFrame(data, columns=columns)
+
+
+def buat_pasangan(n_baris, rasio_persis=0.4, rasio_n1=0.2, seed=0):
+    """
+    Buat pasangan DataFrame (cabang_sby, sby_cabang) masing-masing `n_baris` baris.
+
+    `rasio_persis` dan `rasio_n1` adalah proporsi baris "lain" (kandidat
+    offset) yang dijadikan pasangan persis 1:1 dan grup N:1.
+    """
+    rng = np.random.default_rng(seed)
+    kat_c = _kategori(rng, n_baris, PROPORSI_CABANG_SBY)
+    kat_s = _kategori(rng, n_baris, PROPORSI_SBY_CABANG)
+    # ID Dokumen CABANG 1..n, SBY n+1..2n agar tidak bertabrakan.
+    id_c = np.array([f"{no}/{TAHUN}" for no in range(1, n_baris + 1)], dtype=object)
+    id_s = np.array([f"{no}/{TAHUN}" for no in range(n_baris + 1, 2 * n_baris + 1)], dtype=object)
+
+    lain_c = rng.permutation(np.flatnonzero(kat_c == "lain"))
+    lain_s = rng.permutation(np.flatnonzero(kat_s == "lain"))
+    rujuk_c = np.flatnonzero(np.isin(kat_c, ["bkk", "bkm"]))
+    rujuk_s = np.flatnonzero(np.isin(kat_s, ["bkk", "bkm"]))
+
+    # BKK/BKM merujuk ID Dokumen baris "lain" di sisi lawan (jadi grup A3-A6).
+    ref_c = np.full(n_baris, "", dtype=object)
+    ref_s = np.full(n_baris, "", dtype=object)
+    n_rc = min(rujuk_c.size, lain_s.size)
+    n_rs = min(rujuk_s.size, lain_c.size)
+    ref_c[rujuk_c[:n_rc]] = id_s[lain_s[:n_rc]]
+    ref_s[rujuk_s[:n_rs]] = id_c[lain_c[:n_rs]]
+
+    debet_c = np.zeros(n_baris, dtype=np.int64)
+    kredit_c = np.zeros(n_baris, dtype=np.int64)
+    debet_s = np.zeros(n_baris, dtype=np.int64)
+    kredit_s = np.zeros(n_baris, dtype=np.int64)
+
+    # Baris non-"lain" dan baris yang dirujuk: nominal acak satu arah.
+    tetap_c = np.concatenate([np.flatnonzero(kat_c != "lain"), lain_c[:n_rs]])
+    tetap_s = np.concatenate([np.flatnonzero(kat_s != "lain"), lain_s[:n_rc]])
+    for debet, kredit, baris in ((debet_c, kredit_c, tetap_c), (debet_s, kredit_s, tetap_s)):
+        nilai = _nominal(rng, baris.size)
+        arah = rng.random(baris.size) < 0.5
+        debet[baris[arah]] = nilai[arah]
+        kredit[baris[~arah]] = nilai[~arah]
+
+    _isi_offset(rng, debet_c, kredit_c, debet_s, kredit_s, lain_c[n_rs:], lain_s[n_rc:], rasio_persis, rasio_n1)
+
+    # Atribut (mitra, kapal, tanggal) acak untuk semua baris, termasuk anggota
+    # pasangan dan grup offset: hasil benchmark tidak bergantung pada kunci partisi.
+    atribut_c, atribut_s = _atribut(rng, n_baris), _atribut(rng, n_baris)
+
+    cabang_sby = _frame(rng, n_baris, 1, kat_c, debet_c, kredit_c, ref_c, "cabang", atribut_c)
+    sby_cabang = _frame(rng, n_baris, n_baris + 1, kat_s, debet_s, kredit_s, ref_s, "sby", atribut_s)
+    return cabang_sby, sby_cabang
+
+
+def ke_csv(df, tujuan=None, sep=";"):
+    """Tulis seperti ekspor sistem (UTF-8 BOM); tanpa `tujuan` kembalikan bytes."""
+    teks = df.to_csv(tujuan, sep=sep, index=False, encoding="utf-8-sig")
+    return None if tujuan is not None else teks.encode("utf-8-sig")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat pasangan CSV sintetis CABANG - SBY & SBY - CABANG.")
+    parser.add_argument("n_baris", type=int, help="jumlah baris per file")
+    parser.add_argument("--folder", default=".", help="folder tujuan (default: folder kerja)")
+    parser.add_argument("--rasio-persis", type=float, default=0.4)
+    parser.add_argument("--rasio-n1", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.folder, exist_ok=True)
+    cabang_sby, sby_cabang = buat_pasangan(args.n_baris, args.rasio_persis, args.rasio_n1, args.seed)
+    ke_csv(cabang_sby, os.path.join(args.folder, "CABANG_SBY.csv"))
+    ke_csv(sby_cabang, os.path.join(args.folder, "SBY_CABANG.csv"))
+    print(f"Tersimpan di {args.folder}: CABANG_SBY.csv, SBY_CABANG.csv ({args.n_baris} baris per file)")
+
+
+if __name__ == "__main__":
+    main()
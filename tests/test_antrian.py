@@ -0,0 +1,31 @@
+"""Antrian pekerjaan: kabar kemajuan yang rusak tidak menghentikan pendengar."""
+import time
+
+from rk_antrian import AntrianPekerjaan
+from rk_pipeline import TAHAP_PIPELINE
+from rk_sintetis import buat_pasangan, ke_csv
+
+
+def test_kabar_rusak_dilewati(tmp_path):
+    cabang, sby = buat_pasangan(200, seed=1)
+    ke_csv(cabang, tmp_path / "cabang.csv")
+    ke_csv(sby, tmp_path / "sby.csv")
+    antrian = AntrianPekerjaan(maks_pekerja=1)
+    for kabar in ["bukan tuple", ("terlalu", "pendek"), ("x", "baca", None)]:
+        antrian._kabar.put(kabar)
+
+    id_pekerjaan = antrian.kirim(
+        str(tmp_path / "cabang.csv"), str(tmp_path / "sby.csv"), 0, {"tujuan": str(tmp_path / "hasil.xlsx")},
+    )
+    antrian._kabar.put((id_pekerjaan, "tahap_lain", {"tahap": "tahap_lain", "detik": 0.0}))
+    antrian._kabar.put((id_pekerjaan, "baca", None))
+    batas = time.time() + 120
+    while antrian.ambil(id_pekerjaan).aktif and time.time() < batas:
+        time.sleep(0.1)
+    time.sleep(0.5)   # kabar terakhir pekerja bisa tiba setelah future selesai
+
+    pekerjaan = antrian.ambil(id_pekerjaan)
+    assert pekerjaan.status == "selesai", pekerjaan.galat
+    # Kemajuan tetap dicatat sesudah kabar rusak; tahap tak dikenal tidak ikut.
+    assert [c["tahap"] for c in pekerjaan.catatan] == ["baca", "klasifikasi", "cocok_id", "offset", "ekspor"]
+    assert {c["tahap"] for c in pekerjaan.catatan} <= set(TAHAP_PIPELINE)
@@ -0,0 +1,201 @@
+"""Perilaku mesin pencocokan offset (cocokkan_subset / cari_offset)."""
+import numpy as np
+import pandas as pd
+
+import rk_pipeline
+from rk_pipeline import (
+    MAKS_ANGGOTA_GRUP, MAKS_KANDIDAT_MITM, cari_offset, cari_offset_partisi, cocokkan_subset, kunci_partisi,
+)
+
+
+def _nominal(rng, n):
+    """Nominal acak (sen) kelipatan seribu rupiah, seperti rk_sintetis."""
+    return (np.maximum(np.rint(rng.lognormal(14, 1.2, n) / 1000), 1) * 1000 * 100).astype(np.int64)
+
+
+def _nominal_persis(rng, n):
+    """Nominal acak (sen) tanpa pembulatan: jumlah kebetulan jarang sama."""
+    return np.rint(rng.lognormal(18, 1.2, n)).astype(np.int64)
+
+
+def _periksa_grup(grup, debit, kredit):
+    for g_debit, g_kredit in grup:
+        assert debit[g_debit].sum() == kredit[g_kredit].sum()
+        assert min(len(g_debit), len(g_kredit)) == 1
+        assert len(g_debit) + len(g_kredit) <= MAKS_ANGGOTA_GRUP + 1
+
+
+def test_data_acak_hampir_tanpa_grup():
+    rng = np.random.default_rng(1)
+    debit, kredit = _nominal(rng, 3000), _nominal(rng, 3000)
+    grup, waktu_habis, _ = cocokkan_subset(debit, kredit)
+    _periksa_grup(grup, debit, kredit)
+    assert not waktu_habis
+    assert len(grup) <= 0.02 * debit.size
+
+
+def test_cari_offset_data_acak_nyaris_tanpa_grup_n1():
+    rng = np.random.default_rng(3)
+    n = 2000
+    debet = np.where(rng.random(n) < 0.5, _nominal(rng, n), 0)
+    kredit = np.where(debet == 0, _nominal(rng, n), 0)
+    posisi, id_grup, _, ambigu = cari_offset(debet, kredit)
+    ukuran = np.bincount(id_grup)
+    # Nominal acak kasar masih bisa kebetulan sama (1:1), tetapi grup N:1 jarang.
+    assert (ukuran > 2).sum() <= 0.01 * n
+    assert np.intersect1d(posisi, ambigu).size == 0
+
+
+def test_grup_tanpa_kunci_bersama():
+    # 500rb = 250rb + 150rb + 100rb, dan 500rb = 4 x 125rb: tidak perlu mitra/kapal/tanggal yang sama.
+    grup, _, _ = cocokkan_subset([500_000], [250_000, 150_000, 100_000])
+    assert grup == [([0], [0, 1, 2])]
+    grup, _, _ = cocokkan_subset([500_000], [125_000] * 4)
+    assert grup == [([0], [0, 1, 2, 3])]
+    # Arah sebaliknya (banyak debit = satu kredit) lewat tahap (b).
+    grup, _, _ = cocokkan_subset([125_000] * 4, [500_000])
+    assert grup == [([0, 1, 2, 3], [0])]
+
+
+def test_batas_anggota_berlaku_di_semua_jalur():
+    # Seluruh kandidat tepat berjumlah target: dulu menjadi satu grup 51 baris.
+    grup, _, (ambigu_debit, _) = cocokkan_subset([500_000], [10_000] * 50)
+    assert grup == []
+    assert ambigu_debit.tolist() == [0]
+    grup, _, _ = cocokkan_subset([40_000], [10_000] * 4, maks_anggota=3)
+    assert grup == []
+    grup, _, _ = cocokkan_subset([80_000], [10_000] * 8)
+    assert grup == [([0], list(range(8)))]
+    grup, _, _ = cocokkan_subset([90_000], [10_000] * 9)
+    assert grup == []
+
+
+def test_kombinasi_ambigu_dilaporkan():
+    # 100 = 30 + 70 = 40 + 60: dua kombinasi berbeda, tidak ada yang dipilih.
+    grup, _, (ambigu_debit, ambigu_kredit) = cocokkan_subset([100], [30, 70, 40, 60])
+    assert grup == []
+    assert ambigu_debit.tolist() == [0] and ambigu_kredit.size == 0
+    # Nilai kembar tetap satu kombinasi nilai.
+    grup, _, (ambigu_debit, _) = cocokkan_subset([100], [50, 50, 50])
+    assert grup == [([0], [0, 1])]
+    assert ambigu_debit.size == 0
+
+
+def test_kandidat_banyak_hanya_pasangan():
+    # Lebih dari MAKS_KANDIDAT_MITM kandidat: pasangan tunggal tetap ditemukan,
+    # grup > 2 baris tidak dicari dan targetnya dilaporkan ambigu.
+    pengisi = [1 + 10 * i for i in range(MAKS_KANDIDAT_MITM)]
+    grup, _, _ = cocokkan_subset([500_000], pengisi + [300_000, 200_000])
+    assert grup == [([0], [MAKS_KANDIDAT_MITM, MAKS_KANDIDAT_MITM + 1])]
+    grup, _, (ambigu_debit, _) = cocokkan_subset([500_000], pengisi + [250_000, 150_000, 100_000])
+    assert grup == []
+    assert ambigu_debit.tolist() == [0]
+
+
+def test_kombinasi_kebetulan_di_daerah_padat_ditolak():
+    # 13 kandidat bernominal bulat (kelipatan seribu rupiah): kombinasinya
+    # tunggal, tetapi banyak kombinasi acak berjumlah dekat target, jadi
+    # tidak dipercaya dan targetnya dilaporkan ambigu.
+    rng = np.random.default_rng(9)
+    kredit = _nominal(rng, 20)
+    debit = np.array([kredit[:3].sum()])
+    grup, _, (ambigu_debit, _) = cocokkan_subset(debit, kredit)
+    assert grup == []
+    assert ambigu_debit.tolist() == [0]
+    # Nominal yang sama ditambah sen acak: kombinasi kebetulan jarang, grup diterima.
+    kredit = kredit + rng.integers(1, 100, kredit.size)
+    debit = np.array([kredit[:3].sum()])
+    grup, _, _ = cocokkan_subset(debit, kredit)
+    assert grup == [([0], [0, 1, 2])]
+
+
+def test_cari_offset_melaporkan_baris_ambigu():
+    debet = np.array([100, 0, 0, 0, 0, 999], dtype=np.int64)
+    kredit = np.array([0, 30, 70, 40, 60, 0], dtype=np.int64)
+    posisi, _, _, ambigu = cari_offset(debet, kredit)
+    assert posisi.size == 0
+    assert ambigu.tolist() == [0]
+
+
+def _tanam(rng, n, jumlah_grup, ukuran):
+    """Debit/kredit acak persis dengan grup 1 debit = `ukuran` kredit yang ditanam."""
+    debit, kredit = _nominal_persis(rng, n), _nominal_persis(rng, n)
+    tertanam = {}
+    for i in range(jumlah_grup):
+        anggota = list(range(i * ukuran, (i + 1) * ukuran))
+        debit[i] = kredit[anggota].sum()
+        tertanam[i] = anggota
+    return debit, kredit, tertanam
+
+
+def _periksa_tanam(grup, tertanam):
+    ketemu = {g_debit[0]: g_kredit for g_debit, g_kredit in grup if len(g_debit) == 1}
+    benar = sum(ketemu.get(i) == anggota for i, anggota in tertanam.items())
+    salah = sum(ketemu.get(i) not in (None, anggota) for i, anggota in tertanam.items())
+    return benar, salah
+
+
+def test_grup_tertanam_ditemukan():
+    # Pool besar: hanya pasangan 2 baris yang dicari.
+    rng = np.random.default_rng(4)
+    debit, kredit, tertanam = _tanam(rng, 3000, 300, 2)
+    grup, _, _ = cocokkan_subset(debit, kredit)
+    _periksa_grup(grup, debit, kredit)
+    benar, salah = _periksa_tanam(grup, tertanam)
+    assert benar >= 0.9 * len(tertanam)
+    assert salah <= 0.01 * len(tertanam)
+    # Pool kecil (mis. satu partisi): grup sampai MAKS_ANGGOTA_GRUP baris dicari tuntas.
+    for ukuran in range(3, MAKS_ANGGOTA_GRUP + 1):
+        debit, kredit, tertanam = _tanam(rng, 20, 1, ukuran)
+        grup, _, _ = cocokkan_subset(debit, kredit)
+        _periksa_grup(grup, debit, kredit)
+        assert _periksa_tanam(grup, tertanam) == (1, 0)
+
+
+def test_partisi_mengubah_hasil_n1():
+    # 500 = 300 + 200 = 100 + 400: ambigu tanpa kunci, tunggal di dalam partisi mitra A.
+    df = pd.DataFrame({"Dibayarkan (ke/dari)": ["PT A", "pt a", "PT A ", "PT B", "PT B", None, None]})
+    debet = np.array([500, 0, 0, 0, 0, 0, 700], dtype=np.int64)
+    kredit = np.array([0, 300, 200, 100, 400, 700, 0], dtype=np.int64)
+    posisi, _, _, ambigu = cari_offset(debet[:5], kredit[:5])
+    assert posisi.size == 0 and ambigu.tolist() == [0]
+
+    kunci = kunci_partisi(df, ["Dibayarkan (ke/dari)"])
+    posisi, id_grup, _, ambigu = cari_offset_partisi(debet, kredit, kunci)
+    # Baris tanpa kunci (5, 6) hanya ikut putaran global.
+    assert posisi.tolist() == [0, 1, 2, 5, 6]
+    assert id_grup[0] == id_grup[1] == id_grup[2] != id_grup[3] == id_grup[4]
+    assert ambigu.size == 0
+
+
+def test_partisi_paralel_sama_dengan_berurutan(monkeypatch):
+    monkeypatch.setattr(rk_pipeline, "MIN_BARIS_PARALEL", 0)
+    rng = np.random.default_rng(7)
+    n = 3000
+    debet = np.where(rng.random(n) < 0.5, _nominal_persis(rng, n), 0)
+    kredit = np.where(debet == 0, _nominal_persis(rng, n), 0)
+    kunci = rng.integers(-1, 40, n)
+    berurutan = cari_offset_partisi(debet, kredit, kunci, proses=1)
+    paralel = cari_offset_partisi(debet, kredit, kunci, proses=2)
+    for a, b in zip(berurutan, paralel):
+        assert np.array_equal(a, b)
+
+
+def test_skala_linear(monkeypatch):
+    # Hitung kandidat yang diperiksa (bukan waktu): 4x baris tidak boleh
+    # lebih dari 4x pekerjaan.
+    diperiksa = [0]
+    for nama in ("_kombinasi_mitm", "_pasangan_unik"):
+        def hitung(nilai, *args, _asli=getattr(rk_pipeline, nama)):
+            diperiksa[0] += nilai.size
+            return _asli(nilai, *args)
+        monkeypatch.setattr(rk_pipeline, nama, hitung)
+
+    hasil = []
+    for n in (10_000, 40_000):
+        rng = np.random.default_rng(5)
+        diperiksa[0] = 0
+        _, waktu_habis, _ = cocokkan_subset(_nominal(rng, n), _nominal(rng, n))
+        assert not waktu_habis
+        hasil.append(diperiksa[0])
+    assert hasil[1] <= 4 * hasil[0]
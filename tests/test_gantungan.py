@@ -0,0 +1,53 @@
+"""Simpanan gantungan: baris satu cabang tidak terlihat atau terhapus oleh cabang lain."""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from rk_gantungan import GudangGantungan
+
+
+def _baru(*debet):
+    return pd.DataFrame({"sisi": "cabang_sby", "Debet": list(debet), "Kredit": 0, "ID Dokumen": "X"})
+
+
+def test_cabang_terpisah_dalam_satu_berkas(tmp_path):
+    lokasi = tmp_path / "gantungan.sqlite"
+    bpn, bjm = GudangGantungan("bpn", lokasi), GudangGantungan(" BJM ", lokasi)
+    bpn.simpan("2024-01", [], _baru(500))
+    bjm.simpan("2024-01", [], _baru(500, 700))
+
+    # Periode yang sama disimpan ulang oleh BJM: baris BPN tetap ada.
+    bjm.simpan("2024-01", [], _baru(700))
+    assert bpn.kandidat([-500], "2024-02")["Debet"].tolist() == [500]
+    assert bjm.kandidat([-500], "2024-02").empty
+
+    terpakai = bpn.kandidat([-500], "2024-02")["id_gantungan"].tolist()
+    bpn.simpan("2024-02", terpakai, _baru())
+    assert bpn.ringkasan().empty
+    assert bjm.ringkasan()["baris"].tolist() == [1]
+    # Menyimpan ulang periode 2024-02 BJM tidak membatalkan pemakaian baris BPN.
+    bjm.simpan("2024-02", [], _baru())
+    assert bpn.kandidat([-500], "2024-03").empty
+
+
+def test_simpanan_lama_tanpa_kolom_cabang(tmp_path):
+    lokasi = tmp_path / "lama.sqlite"
+    with sqlite3.connect(lokasi) as con:
+        con.executescript(
+            "CREATE TABLE gantungan (id INTEGER PRIMARY KEY, sisi TEXT NOT NULL, periode TEXT NOT NULL,"
+            " nominal INTEGER NOT NULL, debet INTEGER NOT NULL, kredit INTEGER NOT NULL, periode_cocok TEXT,"
+            " data TEXT NOT NULL);"
+            "INSERT INTO gantungan VALUES (1, 'cabang_sby', '2024-01', 500, 500, 0, NULL, '{}');"
+        )
+    con.close()
+    gudang = GudangGantungan("BPN", lokasi)
+    # Cabang baris lama tidak diketahui, jadi tidak dipakai cabang mana pun.
+    assert gudang.kandidat([-500], "2024-02").empty
+    gudang.simpan("2024-02", [], _baru(500))
+    assert gudang.ringkasan()["baris"].tolist() == [1]
+
+
+def test_kode_cabang_wajib(tmp_path):
+    with pytest.raises(ValueError):
+        GudangGantungan(" ", tmp_path / "gantungan.sqlite")
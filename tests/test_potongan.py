@@ -0,0 +1,50 @@
+"""Mode potongan (proses_rekonsiliasi_potongan) harus sama persis dengan mode biasa."""
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+from rk_pipeline import proses_rekonsiliasi
+from rk_potongan import proses_rekonsiliasi_potongan
+from rk_sintetis import buat_pasangan, ke_csv
+
+
+@pytest.fixture(scope="module")
+def pasangan_csv():
+    cabang, sby = buat_pasangan(3000, seed=3)
+    return ke_csv(cabang), ke_csv(sby)
+
+
+def _isi_zip(berkas):
+    with zipfile.ZipFile(berkas) as arsip:
+        return {nama: arsip.read(nama) for nama in arsip.namelist()}
+
+
+@pytest.mark.parametrize("ukuran_potongan, jumlah_partisi", [(150, 3), (997, 7), (10**6, 1)])
+def test_potongan_sama_dengan_biasa(pasangan_csv, tmp_path, ukuran_potongan, jumlah_partisi):
+    cabang, sby = pasangan_csv
+    biasa = proses_rekonsiliasi(io.BytesIO(cabang), io.BytesIO(sby), 1234.5, format_ekspor="csv")
+    tujuan = tmp_path / "hasil.zip"
+    potongan = proses_rekonsiliasi_potongan(
+        io.BytesIO(cabang), io.BytesIO(sby), 1234.5, format_ekspor="csv",
+        ukuran_potongan=ukuran_potongan, jumlah_partisi=jumlah_partisi, folder=tmp_path, tujuan=tujuan,
+    )
+    assert potongan["berkas"] == tujuan
+    assert _isi_zip(tujuan) == _isi_zip(io.BytesIO(biasa["berkas"]))
+    pd.testing.assert_frame_equal(potongan["ringkasan"], biasa["ringkasan"])
+    assert (potongan["waktu_habis"], potongan["ambigu"]) == (biasa["waktu_habis"], biasa["ambigu"])
+
+
+def test_potongan_xlsx_ke_path(pasangan_csv, tmp_path):
+    cabang, sby = pasangan_csv
+    tujuan = tmp_path / "hasil.xlsx"
+    biasa = proses_rekonsiliasi(io.BytesIO(cabang), io.BytesIO(sby), 0, tujuan=tmp_path / "biasa.xlsx")
+    proses_rekonsiliasi_potongan(
+        io.BytesIO(cabang), io.BytesIO(sby), 0, ukuran_potongan=500, jumlah_partisi=4, folder=tmp_path, tujuan=tujuan,
+    )
+    harapan = pd.read_excel(biasa["berkas"], sheet_name=None)
+    hasil = pd.read_excel(tujuan, sheet_name=None)
+    assert harapan.keys() == hasil.keys()
+    for lembar in harapan:
+        pd.testing.assert_frame_equal(hasil[lembar], harapan[lembar])
@@ -0,0 +1,56 @@
+"""Kolom tanggal: dibaca tanpa menebak urutan hari/bulan dan diekspor tanpa kehilangan isi."""
+import io
+
+import openpyxl
+import pandas as pd
+
+from rk_pipeline import (
+    FORMAT_TANGGAL_XLSX, FORMAT_WAKTU_XLSX, _parse_tanggal, baca_csv, columns, proses_rekonsiliasi, terapkan_skema,
+)
+from rk_sintetis import buat_pasangan, ke_csv
+
+
+def test_urutan_hari_bulan_hanya_bila_pasti():
+    hari_dulu = _parse_tanggal(pd.Series(["13/02/2024", "05/03/2024"]))
+    assert hari_dulu.tolist() == [pd.Timestamp("2024-02-13"), pd.Timestamp("2024-03-05")]
+    bulan_dulu = _parse_tanggal(pd.Series(["02/13/2024", "03/05/2024"]))
+    assert bulan_dulu.tolist() == [pd.Timestamp("2024-02-13"), pd.Timestamp("2024-03-05")]
+    # Tidak ada bagian > 12: 05/03 bisa 5 Maret atau 3 Mei, tidak ditebak.
+    assert _parse_tanggal(pd.Series(["05/03/2024", "2024-01-06"])).isna().tolist() == [True, False]
+
+
+def test_skema_hanya_mengubah_tanggal_yang_bolak_balik():
+    df = pd.DataFrame({
+        "Tanggal Kasir": ["2024-01-06", "2024-01-07 13:45:00", None],
+        "Tanggal Delivery": ["13/02/2024 08:00", "05/03/2024", None],
+    })
+    hasil = terapkan_skema(df)
+    assert pd.api.types.is_datetime64_any_dtype(hasil["Tanggal Kasir"])
+    assert hasil["Tanggal Kasir"][1] == pd.Timestamp("2024-01-07 13:45")
+    assert hasil["Tanggal Delivery"].tolist() == df["Tanggal Delivery"].tolist()
+
+
+def test_csv_dibaca_apa_adanya():
+    data = "Tanggal Kasir;ID Dokumen;Debet\n2024-01-06;007;1.50\n2024-01-07 13:45:00;;2\n".encode("utf-8-sig")
+    df = baca_csv(io.BytesIO(data), columns)
+    assert df["Tanggal Kasir"].tolist() == ["2024-01-06", "2024-01-07 13:45:00"]
+    assert df["ID Dokumen"][0] == "007" and df["Debet"][0] == "1.50"
+
+
+def test_jam_tetap_ada_di_xlsx(tmp_path):
+    cabang, sby = buat_pasangan(50, seed=1)
+    cabang["Tanggal Kasir"] = "2024-01-07 13:45:00"
+    sby["Tanggal Kasir"] = "2024-01-08"
+    tujuan = tmp_path / "hasil.xlsx"
+    proses_rekonsiliasi(io.BytesIO(ke_csv(cabang)), io.BytesIO(ke_csv(sby)), 0, tujuan=tujuan)
+    # Nilai sel selalu menyimpan jam; format tampilannya yang dulu hanya tanggal.
+    sel = {}
+    for lembar in openpyxl.load_workbook(tujuan).worksheets:
+        kolom = [c.value for c in lembar[1]].index("Tanggal Kasir") + 1
+        for (isi,) in lembar.iter_rows(min_row=2, min_col=kolom, max_col=kolom):
+            if isi.value is not None:
+                sel[isi.value] = isi.number_format
+    assert sel == {
+        pd.Timestamp("2024-01-07 13:45"): FORMAT_WAKTU_XLSX,
+        pd.Timestamp("2024-01-08"): FORMAT_TANGGAL_XLSX,
+    }